@@ -0,0 +1,52 @@
+"""On-disk cache for AI validation responses."""
+
+import os
+import time
+from pathlib import Path
+from .utils import _write_atomic, json_dumps, load_json_file
+
+# Cached responses older than this are ignored and refreshed
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def get_cache_dir():
+    """Get the AI response cache directory path, overridable with INTENT_CACHE_DIR."""
+    cache_dir = os.getenv('INTENT_CACHE_DIR')
+    if cache_dir:
+        # .env values are not shell-expanded, so expand a leading ~ here
+        return Path(cache_dir).expanduser()
+    return Path.home() / '.intent' / 'ai_cache'
+
+
+def get(key, ttl=CACHE_TTL_SECONDS):
+    """
+    Load a cached response.
+    
+    Args:
+        key: Cache key (hex digest of the request)
+        ttl: Maximum age of the entry in seconds
+        
+    Returns:
+        dict: The cached response, or None if missing, expired or unreadable
+    """
+    cache_file = get_cache_dir() / f'{key}.json'
+    
+    try:
+        if time.time() - cache_file.stat().st_mtime > ttl:
+            return None
+        
+        return load_json_file(cache_file)
+    except (OSError, ValueError):
+        return None
+
+
+def put(key, value):
+    """Store a response in the cache, ignoring write failures."""
+    cache_dir = get_cache_dir()
+    
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Replace atomically so concurrent readers never see a partial entry
+        _write_atomic(cache_dir / f'{key}.json', json_dumps(value))
+    except OSError:
+        pass
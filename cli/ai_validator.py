@@ -2,117 +2,138 @@
 
 import os
 import json
+import asyncio
+import hashlib
+import functools
+import heapq
 import re
-from openai import OpenAI
-from dotenv import load_dotenv
+import threading
+import time
+import weakref
+import importlib.util
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from . import ai_cache
+from .utils import json_loads, load_env
 
-# Load environment variables
-load_dotenv()
+try:
+    # RE2 matches in linear time, so huge or adversarial diffs cannot
+    # trigger catastrophic backtracking in language detection
+    import re2 as _lang_re
+except ImportError:
+    try:
+        # Where RE2 wheels are unavailable, regex still scans the combined
+        # keyword alternation faster than the stdlib engine
+        import regex as _lang_re
+    except ImportError:
+        _lang_re = re
 
+MODEL = "gpt-4o-mini"
 
-class AIValidator:
-    """Validate code changes against intent using AI."""
-    
-    def __init__(self):
-        """Initialize the AI validator with OpenAI client."""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError(
-                "OPENAI_API_KEY not found. Please set it in your environment or .env file"
-            )
-        self.client = OpenAI(api_key=api_key)
-    
-    def _detect_language(self, code_diff):
-        """Detect the primary programming language from diff."""
-        language_patterns = {
-            'Python': r'\+.*\.(py)[\s:]|import |def |class ',
-            'JavaScript': r'\+.*\.(js|jsx)[\s:]|const |let |function |=>',
-            'TypeScript': r'\+.*\.(ts|tsx)[\s:]|interface |type |const.*:',
-            'Java': r'\+.*\.java[\s:]|public class |private |@Override',
-            'Go': r'\+.*\.go[\s:]|func |package |import ',
-            'Rust': r'\+.*\.rs[\s:]|fn |impl |pub ',
-            'C++': r'\+.*\.(cpp|hpp)[\s:]|#include |namespace |std::',
-            'Ruby': r'\+.*\.rb[\s:]|def |class |end$',
-            'PHP': r'\+.*\.php[\s:]|<\?php|function |class ',
-        }
-        
-        for lang, pattern in language_patterns.items():
-            if re.search(pattern, code_diff, re.MULTILINE):
-                return lang
-        
-        return 'Unknown'
-    
-    def _get_language_context(self, language):
-        """Get language-specific security and best practice context."""
-        contexts = {
-            'Python': "Check for: SQL injection in raw queries, unsafe pickle usage, command injection via os.system, eval/exec usage.",
-            'JavaScript': "Check for: XSS vulnerabilities, prototype pollution, unsafe innerHTML, eval usage, missing input sanitization.",
-            'TypeScript': "Check for: Type casting bypasses, 'any' type overuse, missing null checks, unsafe type assertions.",
-            'Java': "Check for: SQL injection, XML injection, deserialization vulnerabilities, path traversal.",
-            'Go': "Check for: SQL injection, command injection, race conditions, error handling issues.",
-            'PHP': "Check for: SQL injection, XSS, file inclusion vulnerabilities, command injection.",
-            'Unknown': "Check for: Common security vulnerabilities and code quality issues."
-        }
-        return contexts.get(language, contexts['Unknown'])
-    
-    def get_intent_history(self, max_items=3):
-        """Get recent intent history for context."""
-        from .utils import get_intent_dir
-        intent_dir = get_intent_dir()
-        
-        if not intent_dir.exists():
-            return []
-        
-        history = []
-        for intent_file in sorted(intent_dir.glob('intent_*.json'), reverse=True)[:max_items]:
-            try:
-                with open(intent_file, 'r') as f:
-                    data = json.load(f)
-                    # Extract validation score if exists
-                    score = None
-                    if data.get('commits'):
-                        for commit in data['commits']:
-                            if commit.get('validation', {}).get('score'):
-                                score = commit['validation']['score']
-                                break
-                    
-                    history.append({
-                        'intent': data.get('message', ''),
-                        'score': score,
-                        'commits': len(data.get('commits', []))
-                    })
-            except:
-                continue
-        
-        return history
-    
-    def validate_intent(self, intent_message, code_diff):
-        """
-        Validate if code changes align with the stated intent.
-        
-        Args:
-            intent_message: The developer's stated intent
-            code_diff: Git diff of the changes
-            
-        Returns:
-            dict: Validation results with alignment score and explanation
-        """
-        # Detect language and get context
-        language = self._detect_language(code_diff)
-        
-        # Get historical context
-        history = self.get_intent_history()
-        history_context = ""
-        if history:
-            history_context = "\n\nHistorical Context (learn from past patterns):\n"
-            for h in history:
-                if h['score']:
-                    history_context += f"- Past intent: '{h['intent']}' achieved alignment score {h['score']}/10\n"
-        
-        # Build enhanced prompt with all improvements
-        prompt = f"""You are an expert code reviewer analyzing intent-code alignment. Be balanced and practical.
+# Bump whenever prompt wording or response schemas change, so cached
+# responses produced by older prompts are not reused
+PROMPT_VERSION = "2"
+
+# Files touched by the diff, from its "+++ b/..." and "--- a/..." headers.
+# Patterns scanned over whole diffs use inline flags, which RE2 and re share.
+_DIFF_FILE_RE = _lang_re.compile(r'(?m)^(?:\+\+\+ b|--- a)/(.+)$')
+
+_EXTENSION_LANGUAGES = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.jsx': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.tsx': 'TypeScript',
+    '.java': 'Java',
+    '.go': 'Go',
+    '.rs': 'Rust',
+    '.cpp': 'C++',
+    '.hpp': 'C++',
+    '.rb': 'Ruby',
+    '.php': 'PHP',
+}
+
+# Prose files; a diff touching only these is never code, whatever its words
+_DOC_EXTENSIONS = frozenset({'.md', '.markdown', '.rst', '.txt', '.adoc', '.asciidoc', '.org'})
+
+# Keyword heuristics in priority order, combined into one alternation so a
+# single scan finds the first match; keywords shared with a higher-priority
+# language (e.g. "def " for Ruby) can never win and are omitted
+_LANGUAGE_KEYWORDS = {
+    'Python': r'import |def |class ',
+    'JavaScript': r'const |let |function |=>',
+    'TypeScript': r'interface |type |const.*:',
+    'Java': r'public class |private |@Override',
+    'Go': r'func |package ',
+    'Rust': r'fn |impl |pub ',
+    'C++': r'#include |namespace |std::',
+    'Ruby': r'end$',
+    'PHP': r'<\?php',
+}
+# Regex group names must be identifiers, so map them back to language names
+_LANGUAGE_GROUPS = {re.sub(r'\W', 'p', lang): lang for lang in _LANGUAGE_KEYWORDS}
+_LANGUAGE_RE = _lang_re.compile(
+    '(?m)' + '|'.join(f'(?P<{group}>{_LANGUAGE_KEYWORDS[lang]})' for group, lang in _LANGUAGE_GROUPS.items())
+)
+
+# Completion budgets sized to the JSON schemas with headroom; generation
+# time grows with output tokens, so these are kept tight
+INTENT_MAX_TOKENS = 700
+VULNERABILITY_MAX_TOKENS = 1000
+ANALYSIS_MAX_TOKENS = INTENT_MAX_TOKENS + VULNERABILITY_MAX_TOKENS
+
+_INTENT_ERROR_DEFAULTS = {'score': None, 'confidence': 0}
+# A failed scan has no severity to report, so it is never mistaken for a clean one
+_VULNERABILITY_ERROR_DEFAULTS = {'overall_severity': 'UNKNOWN', 'confidence': 0}
+
+# Diffs with no detectable code and fewer changed lines than this are
+# answered locally instead of being sent to the AI
+TRIVIAL_DIFF_MAX_LINES = 10
+_TRIVIAL_DIFF_REASON = 'No code changes detected'
+_SKIPPED_INTENT_RESULT = {
+    'score': None,
+    'confidence': 0,
+    'alignment': 'not_applicable',
+    'skipped': _TRIVIAL_DIFF_REASON,
+}
+_SKIPPED_VULNERABILITY_RESULT = {
+    'overall_severity': 'NONE',
+    'confidence': 0,
+    'vulnerabilities': [],
+    'skipped': _TRIVIAL_DIFF_REASON,
+}
+
+# Rough prompt budget for a diff; larger diffs are validated in chunks
+MAX_DIFF_TOKENS = 6000
+_CHARS_PER_TOKEN = 4
+# Unchanged lines kept on each side of a change
+_DIFF_CONTEXT_LINES = 2
+# Files whose name marks them as minified, generated or binary; only
+# their header is sent, as the content is not worth reviewing
+_GENERATED_FILE_RE = re.compile(
+    r'^diff --git a/.* b/(?:.*/)?(?:.*\.min\.\w+|.*\.map|package-lock\.json|yarn\.lock|'
+    r'pnpm-lock\.yaml|poetry\.lock|Pipfile\.lock|Cargo\.lock|Gemfile\.lock|composer\.lock|go\.sum)$'
+    r'|^(?:Binary files |GIT binary patch)',
+    re.MULTILINE
+)
+_MINIFIED_PLACEHOLDER = '[minified or generated content omitted]\n'
+# Lines this long are dropped from other files, keeping the rest of the hunk
+_MINIFIED_LINE_LENGTH = 500
+# Upper bound on chunk requests in flight for the sync API
+MAX_CHUNK_WORKERS = 4
 
-SCORING RULES:
+# Limits on sync and async API calls; override with INTENT_AI_CONCURRENCY and
+# INTENT_AI_TPM (tokens per minute, 0 disables the rate limit)
+DEFAULT_AI_CONCURRENCY = 8
+DEFAULT_AI_TPM = 200000
+
+_FILE_SPLIT_RE = re.compile(r'^(?=diff --git )', re.MULTILINE)
+_HUNK_SPLIT_RE = re.compile(r'^(?=@@)', re.MULTILINE)
+
+_RISK_LEVELS = ['low', 'medium', 'high']
+_SEVERITY_LEVELS = ['NONE', 'LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+
+_INTENT_RUBRIC = """SCORING RULES:
 - Score 0-2: Code does NOT implement the stated intent AT ALL (completely unrelated changes)
 - Score 3-4: Code barely relates to intent, mostly unrelated changes
 - Score 5-6: Partial implementation, missing some expected functionality
@@ -154,26 +175,18 @@ INSTRUCTIONS FOR ANALYZING GIT DIFFS:
 - Lines with '+' are NEW CODE ADDED - analyze these carefully!
 - Lines with '-' are CODE REMOVED
 - Lines without +/- are CONTEXT (unchanged)
-- Focus on whether CORE functionality is present, not perfection
+- Focus on whether CORE functionality is present, not perfection"""
 
-CURRENT ANALYSIS:
-Language Detected: {language}
-Developer's Stated Intent: "{intent_message}"{history_context}
-
-Code Changes (Git Diff):
-{code_diff}
-
-STEP-BY-STEP ANALYSIS:
+_INTENT_STEPS = """STEP-BY-STEP ANALYSIS:
 1. Identify the KEY FUNCTIONALITY mentioned in the intent
 2. Search the diff for evidence of that functionality
 3. If KEY FUNCTIONALITY is present and working → Score 7-10
 4. If KEY FUNCTIONALITY partially present → Score 4-6
 5. If completely unrelated → Score 0-3
 
-Be practical and focus on intent alignment, not code perfection.
+Be practical and focus on intent alignment, not code perfection."""
 
-RESPOND IN VALID JSON FORMAT ONLY:
-{{
+_INTENT_SCHEMA = """{
   "score": <0-10 integer>,
   "confidence": <0-100 integer>,
   "alignment": "<aligned|partially_aligned|misaligned>",
@@ -185,65 +198,9 @@ RESPOND IN VALID JSON FORMAT ONLY:
   "suggestions": ["how to actually implement the stated intent"],
   "risk_level": "<low|medium|high>",
   "needs_human_review": <true|false>
-}}
-"""
-        
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert code reviewer. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-        
-        except json.JSONDecodeError as e:
-            return {
-                'error': f'JSON parsing error: {str(e)}',
-                'score': None,
-                'confidence': 0
-            }
-        except Exception as e:
-            return {
-                'error': str(e),
-                'score': None,
-                'confidence': 0
-            }
-    
-    def check_vulnerabilities(self, code_diff):
-        """
-        Check code changes for security vulnerabilities.
-        
-        Args:
-            code_diff: Git diff of the changes
-            
-        Returns:
-            dict: Vulnerability analysis results
-        """
-        # Detect language for context-specific scanning
-        language = self._detect_language(code_diff)
-        lang_context = self._get_language_context(language)
-        
-        prompt = f"""You are a cybersecurity expert analyzing code for vulnerabilities.
+}"""
 
-Language: {language}
-Language-Specific Context: {lang_context}
-
-INSTRUCTIONS FOR ANALYZING GIT DIFFS:
-- Lines with '+' are NEW CODE (analyze these carefully!)
-- Lines with '-' are REMOVED CODE (less critical but note what was removed)
-- Focus security analysis on the NEW code being added
-
-Code Changes (Git Diff):
-{code_diff}
-
-COMPREHENSIVE SECURITY SCAN:
+_SECURITY_SCAN = """COMPREHENSIVE SECURITY SCAN:
 
 1. AUTHENTICATION & AUTHORIZATION:
    - Missing authentication checks
@@ -279,51 +236,874 @@ ANALYZE SYSTEMATICALLY:
 1. Identify all potential vulnerabilities
 2. Assess severity for each
 3. Provide specific line references if possible
-4. Suggest concrete fixes
+4. Suggest concrete fixes"""
 
-RESPOND IN VALID JSON FORMAT ONLY:
-{{
+_SECURITY_SCHEMA = """{
   "overall_severity": "<NONE|LOW|MEDIUM|HIGH|CRITICAL>",
   "confidence": <0-100 integer>,
   "vulnerabilities": [
-    {{
+    {
       "type": "sql_injection|xss|auth|secrets|etc",
       "severity": "LOW|MEDIUM|HIGH|CRITICAL",
       "description": "detailed description",
       "location": "approximate line or context",
       "fix": "specific remediation steps"
-    }}
+    }
   ],
   "safe_practices_found": ["list good security practices used"],
   "recommendations": ["prioritized security recommendations"],
   "requires_immediate_action": <true|false>
-}}
-"""
+}"""
+
+# Static instructions are sent as the system message and the per-call data
+# as a short user message, so every request shares the same prompt prefix
+# and benefits from OpenAI's automatic prompt caching
+_VALIDATE_SYSTEM = f"""You are an expert code reviewer analyzing intent-code alignment. Be balanced and practical.
+
+{_INTENT_RUBRIC}
+
+{_INTENT_STEPS}
+
+RESPOND IN VALID JSON FORMAT ONLY:
+{_INTENT_SCHEMA}"""
+
+_SECURITY_SYSTEM = f"""You are a cybersecurity expert analyzing code for vulnerabilities.
+
+INSTRUCTIONS FOR ANALYZING GIT DIFFS:
+- Lines with '+' are NEW CODE (analyze these carefully!)
+- Lines with '-' are REMOVED CODE (less critical but note what was removed)
+- Focus security analysis on the NEW code being added
+
+{_SECURITY_SCAN}
+
+RESPOND IN VALID JSON FORMAT ONLY:
+{_SECURITY_SCHEMA}"""
+
+_ANALYZE_SYSTEM = f"""You are an expert code reviewer and cybersecurity expert. Perform TWO analyses of the same code changes: an intent alignment review and a security scan. Be balanced and practical.
+
+=== PART 1: INTENT ALIGNMENT ===
+
+{_INTENT_RUBRIC}
+
+{_INTENT_STEPS}
+
+=== PART 2: SECURITY SCAN ===
+
+Focus security analysis on the NEW code being added ('+' lines); note what removed code ('-' lines) took away.
+
+{_SECURITY_SCAN}
+
+RESPOND IN VALID JSON FORMAT ONLY, with one object per analysis:
+{{
+  "alignment": {_INTENT_SCHEMA},
+  "security": {_SECURITY_SCHEMA}
+}}"""
+
+# Scalar fields worth showing before the rest of a streamed response arrives.
+# Numbers must be followed by a delimiter so "1" is not reported for "10".
+_PROGRESS_FIELD_RE = re.compile(
+    r'"(score|alignment|overall_severity)"\s*:\s*'
+    r'("(?:[^"\\]|\\.)*"|-?\d+(?=\s*[,}])|true|false|null)'
+)
+
+
+class _ProgressWatcher:
+    """Report selected fields of a JSON response as soon as they are complete."""
+    
+    def __init__(self, on_progress):
+        self.on_progress = on_progress
+        self.buffer = ''
+        self.pos = 0
+        self.seen = set()
+    
+    def feed(self, text):
+        """Add streamed text and report any newly completed fields."""
+        self.buffer += text
+        for match in _PROGRESS_FIELD_RE.finditer(self.buffer, self.pos):
+            self.pos = match.end()
+            field = match.group(1)
+            if field not in self.seen:
+                self.seen.add(field)
+                self.on_progress(field, json_loads(match.group(2)))
+
+
+def _chunk_text(chunk):
+    """Extract the content delta from a streamed completion chunk."""
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+def _read_stream(stream, on_progress=None):
+    """Collect a streamed completion, reporting progress along the way."""
+    watcher = _ProgressWatcher(on_progress) if on_progress else None
+    content_parts = []
+    for chunk in stream:
+        text = _chunk_text(chunk)
+        if text:
+            content_parts.append(text)
+            if watcher:
+                watcher.feed(text)
+    return ''.join(content_parts)
+
+
+async def _aread_stream(stream, on_progress=None):
+    """Async variant of _read_stream."""
+    watcher = _ProgressWatcher(on_progress) if on_progress else None
+    content_parts = []
+    async for chunk in stream:
+        text = _chunk_text(chunk)
+        if text:
+            content_parts.append(text)
+            if watcher:
+                watcher.feed(text)
+    return ''.join(content_parts)
+
+
+@functools.lru_cache(maxsize=16)
+def _detect_diff_language(code_diff):
+    """
+    Detect the primary programming language from diff.
+    
+    Memoized because the same diff is classified by every check that is
+    run on it.
+    """
+    # File extensions from the diff headers are the most reliable signal
+    file_extensions = [os.path.splitext(path)[1].lower() for path in _DIFF_FILE_RE.findall(code_diff)]
+    extensions = Counter(_EXTENSION_LANGUAGES[ext] for ext in file_extensions if ext in _EXTENSION_LANGUAGES)
+    if extensions:
+        return extensions.most_common(1)[0][0]
+    
+    # Keywords would misread prose ("import data", "type of") as code
+    if file_extensions and all(ext in _DOC_EXTENSIONS for ext in file_extensions):
+        return 'Unknown'
+    
+    # Otherwise fall back to keywords, found in a single pass over the diff
+    match = _LANGUAGE_RE.search(code_diff)
+    if match:
+        return _LANGUAGE_GROUPS[match.lastgroup]
+    
+    return 'Unknown'
+
+
+def _trim_context(hunk):
+    """Drop unchanged lines further than _DIFF_CONTEXT_LINES from any change."""
+    lines = hunk.splitlines(keepends=True)
+    header, body = lines[0], lines[1:]
+    keep = set()
+    for i, line in enumerate(body):
+        if line.startswith(('+', '-')):
+            keep.update(range(i - _DIFF_CONTEXT_LINES, i + _DIFF_CONTEXT_LINES + 1))
+    return header + ''.join(line for i, line in enumerate(body) if i in keep)
+
+
+def _drop_long_lines(hunk):
+    """Replace overlong lines of a hunk by a marker, keeping their +/- prefix."""
+    lines = hunk.splitlines(keepends=True)
+    return ''.join(
+        f"{line[0]}[line of {len(line)} characters omitted]\n" if len(line) > _MINIFIED_LINE_LENGTH else line
+        for line in lines
+    )
+
+
+def _pack_chunks(pieces, max_chars):
+    """Greedily group diff pieces into chunks of at most max_chars."""
+    chunks = []
+    current = []
+    size = 0
+    for piece in pieces:
+        if current and size + len(piece) > max_chars:
+            chunks.append(''.join(current))
+            current = []
+            size = 0
+        current.append(piece)
+        size += len(piece)
+    chunks.append(''.join(current))
+    return chunks
+
+
+def _compress_diff(code_diff, max_tokens=MAX_DIFF_TOKENS):
+    """
+    Shrink a diff for the prompt and split it into chunks within budget.
+    
+    Unchanged context beyond a couple of lines around each change is dropped
+    and minified or generated files are reduced to their headers, while
+    overlong lines elsewhere are replaced by a short marker. What
+    remains is packed file by file into chunks of roughly max_tokens; a
+    single file over budget is split at hunk boundaries.
+    
+    Args:
+        code_diff: Git diff of the changes
+        max_tokens: Estimated token budget per chunk
+        
+    Returns:
+        list: Diff chunks, a single one when the diff fits in one prompt
+    """
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    pieces = []
+    for section in _FILE_SPLIT_RE.split(code_diff):
+        if not section:
+            continue
+        
+        header, *hunks = _HUNK_SPLIT_RE.split(section)
+        if _GENERATED_FILE_RE.search(header):
+            pieces.append(header + _MINIFIED_PLACEHOLDER)
+            continue
+        
+        hunks = [_trim_context(_drop_long_lines(hunk)) for hunk in hunks]
+        compressed = header + ''.join(hunks)
+        if len(compressed) <= max_chars:
+            pieces.append(compressed)
+        else:
+            pieces.extend(header + hunk for hunk in hunks)
+    
+    return _pack_chunks(pieces, max_chars)
+
+
+def _merge_lists(results, field):
+    """Concatenate a list field across results, dropping duplicates."""
+    merged = []
+    for result in results:
+        for item in result.get(field) or []:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+
+def _chunk_failures(failed, total):
+    """
+    Describe chunks whose analysis failed, so a partial merge is never mistaken for a full one.
+    
+    The summary goes under error only when every chunk failed, as callers
+    read error as "no result"; otherwise it goes under partial_error.
+    """
+    if not failed:
+        return {'failed_chunks': 0}
+    
+    reason = next((r['error'] for r in failed if r.get('error')), 'no usable result')
+    key = 'error' if len(failed) == total else 'partial_error'
+    return {
+        'failed_chunks': len(failed),
+        key: f"{len(failed)} of {total} diff chunks could not be analyzed: {reason}",
+    }
+
+
+def _merge_intent_results(results, weights):
+    """
+    Combine per-chunk intent validations into a single result.
+    
+    The score is averaged weighted by chunk size, while risk and review
+    flags take the most cautious answer of any chunk. Chunks that failed
+    are counted in failed_chunks and reported under partial_error, and
+    always call for human review.
+    """
+    def has_score(result):
+        return 'error' not in result and isinstance(result.get('score'), (int, float))
+    
+    scored = [(result, weight) for result, weight in zip(results, weights) if has_score(result)]
+    if not scored:
+        return {**results[0], 'chunks': len(results), **_chunk_failures(results, len(results))}
+    
+    ok = [result for result, _ in scored]
+    failed = [result for result in results if not has_score(result)]
+    total = sum(weight for _, weight in scored)
+    score = round(sum(result['score'] * weight for result, weight in scored) / total)
+    
+    if score >= 7:
+        alignment = 'aligned'
+    elif score >= 4:
+        alignment = 'partially_aligned'
+    else:
+        alignment = 'misaligned'
+    
+    risks = [r.get('risk_level') for r in ok if r.get('risk_level') in _RISK_LEVELS]
+    return {
+        'score': score,
+        'confidence': min(r.get('confidence') or 0 for r in ok),
+        'alignment': alignment,
+        'intent_summary': ok[0].get('intent_summary', ''),
+        'actual_changes': ' '.join(r['actual_changes'] for r in ok if r.get('actual_changes')),
+        'key_functionality_present': any(r.get('key_functionality_present') for r in ok),
+        'matches': _merge_lists(ok, 'matches'),
+        'discrepancies': _merge_lists(ok, 'discrepancies'),
+        'suggestions': _merge_lists(ok, 'suggestions'),
+        'risk_level': max(risks, key=_RISK_LEVELS.index) if risks else 'low',
+        'needs_human_review': bool(failed) or any(r.get('needs_human_review') for r in ok),
+        'chunks': len(results),
+        **_chunk_failures(failed, len(results)),
+    }
+
+
+def _merge_vulnerability_results(results):
+    """
+    Combine per-chunk vulnerability scans, keeping the worst severity.
+    
+    If any chunk failed the diff was only partly scanned, so the result
+    carries failed_chunks and partial_error, and a clean scan of the remaining
+    chunks is reported as UNKNOWN rather than NONE.
+    """
+    ok = [result for result in results if 'error' not in result]
+    failed = [result for result in results if 'error' in result]
+    if not ok:
+        return {**results[0], 'chunks': len(results), **_chunk_failures(failed, len(results))}
+    
+    severities = [r.get('overall_severity') for r in ok if r.get('overall_severity') in _SEVERITY_LEVELS]
+    severity = max(severities, key=_SEVERITY_LEVELS.index) if severities else 'NONE'
+    if failed and severity == 'NONE':
+        severity = 'UNKNOWN'
+    
+    return {
+        'overall_severity': severity,
+        'confidence': min(r.get('confidence') or 0 for r in ok),
+        'vulnerabilities': [v for r in ok for v in r.get('vulnerabilities') or []],
+        'safe_practices_found': _merge_lists(ok, 'safe_practices_found'),
+        'recommendations': _merge_lists(ok, 'recommendations'),
+        'requires_immediate_action': any(r.get('requires_immediate_action') for r in ok),
+        'chunks': len(results),
+        **_chunk_failures(failed, len(results)),
+    }
+
+
+def _map_chunks(func, chunks):
+    """Run func over diff chunks, concurrently when there are several."""
+    if len(chunks) == 1:
+        return [func(chunks[0])]
+    
+    with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_CHUNK_WORKERS)) as executor:
+        return list(executor.map(func, chunks))
+
+
+class _TokenBucket:
+    """
+    Spread API calls so their estimated tokens stay within a per-minute budget.
+    
+    The bucket is guarded by a thread lock that is only held to update its
+    count, so it serves both threads and an event loop.
+    """
+    
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _take(self, tokens):
+        """Spend tokens if available, otherwise return the seconds to wait for them."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+    
+    def acquire(self, tokens):
+        """Block until tokens can be spent, then spend them."""
+        if not self.capacity:
+            return
+        
+        # A single request larger than the budget only waits for a full bucket
+        tokens = min(tokens, self.capacity)
+        while True:
+            delay = self._take(tokens)
+            if not delay:
+                return
+            time.sleep(delay)
+    
+    async def reserve(self, tokens):
+        """Async variant of acquire, sleeping without blocking the event loop."""
+        if not self.capacity:
+            return
+        
+        tokens = min(tokens, self.capacity)
+        while True:
+            delay = self._take(tokens)
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+
+def _limit_settings():
+    """Read the request concurrency and tokens per minute allowed."""
+    concurrency = int(os.getenv('INTENT_AI_CONCURRENCY', DEFAULT_AI_CONCURRENCY))
+    if concurrency <= 0:
+        # A semaphore of 0 would make every call wait forever
+        raise ValueError(f"INTENT_AI_CONCURRENCY must be at least 1, got {concurrency}")
+    return concurrency, int(os.getenv('INTENT_AI_TPM', DEFAULT_AI_TPM))
+
+
+# Semaphores and locks belong to one event loop, so limiters are kept per loop
+_limiters = weakref.WeakKeyDictionary()
+
+
+def _get_limiter():
+    """Get the concurrency semaphore and token bucket of the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _limiters:
+        concurrency, tpm = _limit_settings()
+        _limiters[loop] = (asyncio.Semaphore(concurrency), _TokenBucket(tpm))
+    return _limiters[loop]
+
+
+# Sync calls come from any thread (stories and their chunks run in
+# thread pools), so they share one limiter for the whole process
+_sync_limiter = None
+_sync_limiter_lock = threading.Lock()
+
+
+def _get_sync_limiter():
+    """Get the process-wide concurrency semaphore and token bucket for sync calls."""
+    global _sync_limiter
+    with _sync_limiter_lock:
+        if _sync_limiter is None:
+            concurrency, tpm = _limit_settings()
+            _sync_limiter = (threading.BoundedSemaphore(concurrency), _TokenBucket(tpm))
+        return _sync_limiter
+
+
+def _estimate_tokens(messages, max_tokens):
+    """Roughly estimate the tokens a request consumes, prompt plus completion."""
+    return sum(len(m['content']) for m in messages) // _CHARS_PER_TOKEN + max_tokens
+
+
+class AIValidator:
+    """Validate code changes against intent using AI."""
+    
+    def __init__(self, use_cache=True, skip_trivial=False):
+        """
+        Initialize the AI validator with OpenAI client.
+        
+        Args:
+            use_cache: Reuse cached responses for identical requests
+            skip_trivial: Answer docs-only and whitespace diffs locally
+                without calling the API
+        """
+        # openai pulls in httpx, pydantic and anyio; import it only when needed
+        from openai import AsyncOpenAI, DefaultHttpxClient, OpenAI
+        
+        load_env()
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError(
+                "OPENAI_API_KEY not found. Please set it in your environment or .env file"
+            )
+        # The keep-alive pool lets successive requests reuse the TLS connection,
+        # and HTTP/2 (when h2 is installed) lets concurrent chunks share it
+        http2 = importlib.util.find_spec('h2') is not None
+        self.client = OpenAI(api_key=api_key, http_client=DefaultHttpxClient(http2=http2))
+        self.aclient = AsyncOpenAI(api_key=api_key)
+        self.use_cache = use_cache
+        self.skip_trivial = skip_trivial
+    
+    def _detect_language(self, code_diff):
+        """Detect the primary programming language from diff."""
+        return _detect_diff_language(code_diff)
+    
+    def _is_trivial_diff(self, code_diff, language=None):
+        """Check if a diff has no code and too few changes to need AI review."""
+        if not self.skip_trivial or (language or self._detect_language(code_diff)) != 'Unknown':
+            return False
         
+        changed_lines = sum(
+            1 for line in code_diff.splitlines()
+            if line.startswith(('+', '-'))
+            and not line.startswith(('+++', '---'))
+            and line[1:].strip()
+        )
+        return changed_lines < TRIVIAL_DIFF_MAX_LINES
+    
+    def _get_language_context(self, language):
+        """Get language-specific security and best practice context."""
+        contexts = {
+            'Python': "Check for: SQL injection in raw queries, unsafe pickle usage, command injection via os.system, eval/exec usage.",
+            'JavaScript': "Check for: XSS vulnerabilities, prototype pollution, unsafe innerHTML, eval usage, missing input sanitization.",
+            'TypeScript': "Check for: Type casting bypasses, 'any' type overuse, missing null checks, unsafe type assertions.",
+            'Java': "Check for: SQL injection, XML injection, deserialization vulnerabilities, path traversal.",
+            'Go': "Check for: SQL injection, command injection, race conditions, error handling issues.",
+            'PHP': "Check for: SQL injection, XSS, file inclusion vulnerabilities, command injection.",
+            'Unknown': "Check for: Common security vulnerabilities and code quality issues."
+        }
+        return contexts.get(language, contexts['Unknown'])
+    
+    def get_intent_history(self, max_items=3):
+        """Get recent intent history for context."""
+        from .utils import get_intent_dir, load_json_file
+        intent_dir = get_intent_dir()
+        
+        # History files are named by timestamp; pick the newest without
+        # sorting the whole directory or building a Path per entry
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a cybersecurity expert. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Lower temperature for more conservative security analysis
-                max_tokens=2000,
-                response_format={"type": "json_object"}
+            with os.scandir(intent_dir) as entries:
+                recent_files = heapq.nlargest(
+                    max_items,
+                    (e for e in entries if e.name.startswith('intent_') and e.name.endswith('.json')),
+                    key=lambda e: e.name
+                )
+        except FileNotFoundError:
+            return []
+        
+        history = []
+        for intent_file in recent_files:
+            try:
+                data = load_json_file(intent_file.path)
+                # Extract validation score if exists
+                score = None
+                if data.get('commits'):
+                    for commit in data['commits']:
+                        if (commit.get('validation') or {}).get('score'):
+                            score = commit['validation']['score']
+                            break
+                
+                history.append({
+                    'intent': data.get('message', ''),
+                    'score': score,
+                    'commits': len(data.get('commits', []))
+                })
+            except Exception:
+                continue
+        
+        return history
+    
+    def _history_context(self):
+        """Summarize past intent scores for inclusion in the prompt."""
+        history = self.get_intent_history()
+        history_context = ""
+        if history:
+            history_context = "\n\nHistorical Context (learn from past patterns):\n"
+            for h in history:
+                if h['score']:
+                    history_context += f"- Past intent: '{h['intent']}' achieved alignment score {h['score']}/10\n"
+        return history_context
+    
+    def _cache_key(self, messages):
+        """Hash everything that determines a response into a cache key."""
+        # Stdlib json keeps keys identical whether or not orjson is installed
+        payload = json.dumps([MODEL, PROMPT_VERSION, messages], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _complete(self, messages, temperature, max_tokens, error_defaults, on_progress=None):
+        """
+        Send a streamed chat completion request and decode its JSON response.
+        
+        on_progress(field, value) is called for key fields (score, alignment,
+        overall_severity) as soon as they arrive, before the full response.
+        """
+        cache_key = self._cache_key(messages) if self.use_cache else None
+        if cache_key:
+            cached = ai_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        concurrency, bucket = _get_sync_limiter()
+        try:
+            # Bound requests in flight across all threads, e.g. PR stories
+            # each validating several chunks, and their token rate
+            with concurrency:
+                bucket.acquire(_estimate_tokens(messages, max_tokens))
+                stream = self.client.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"},
+                    seed=0,
+                    stream=True
+                )
+                
+                result = json_loads(_read_stream(stream, on_progress))
+        
+        except json.JSONDecodeError as e:
+            return {'error': f'JSON parsing error: {str(e)}', **error_defaults}
+        except Exception as e:
+            return {'error': str(e), **error_defaults}
+        
+        if cache_key:
+            ai_cache.put(cache_key, result)
+        return result
+    
+    async def _acomplete(self, messages, temperature, max_tokens, error_defaults, on_progress=None):
+        """Async variant of _complete using the AsyncOpenAI client."""
+        cache_key = self._cache_key(messages) if self.use_cache else None
+        if cache_key:
+            cached = ai_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        concurrency, bucket = _get_limiter()
+        try:
+            # Bound requests in flight and their token rate so batch
+            # validation backs off locally instead of tripping 429s
+            async with concurrency:
+                await bucket.reserve(_estimate_tokens(messages, max_tokens))
+                stream = await self.aclient.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"},
+                    seed=0,
+                    stream=True
+                )
+                
+                result = json_loads(await _aread_stream(stream, on_progress))
+        
+        except json.JSONDecodeError as e:
+            return {'error': f'JSON parsing error: {str(e)}', **error_defaults}
+        except Exception as e:
+            return {'error': str(e), **error_defaults}
+        
+        if cache_key:
+            ai_cache.put(cache_key, result)
+        return result
+    
+    def validate_intent(self, intent_message, code_diff, on_progress=None, language=None):
+        """
+        Validate if code changes align with the stated intent.
+        
+        Diffs over MAX_DIFF_TOKENS are validated in chunks concurrently and
+        the results merged.
+        
+        Args:
+            intent_message: The developer's stated intent
+            code_diff: Git diff of the changes
+            on_progress: Optional callback(field, value) for early results
+            language: Language of the diff, detected when not given
+            
+        Returns:
+            dict: Validation results with alignment score and explanation
+        """
+        language = language or self._detect_language(code_diff)
+        if self._is_trivial_diff(code_diff, language):
+            return dict(_SKIPPED_INTENT_RESULT)
+        
+        chunks = _compress_diff(code_diff)
+        # Early results of a single chunk would be misleading for the whole diff
+        progress = on_progress if len(chunks) == 1 else None
+        results = _map_chunks(
+            lambda chunk: self._complete(
+                self._intent_messages(intent_message, chunk, language),
+                temperature=0.3,
+                max_tokens=INTENT_MAX_TOKENS,
+                error_defaults=_INTENT_ERROR_DEFAULTS,
+                on_progress=progress
+            ),
+            chunks
+        )
+        
+        if len(results) == 1:
+            return results[0]
+        return _merge_intent_results(results, [len(chunk) for chunk in chunks])
+    
+    async def avalidate_intent(self, intent_message, code_diff, on_progress=None, language=None):
+        """Async variant of validate_intent, for running alongside other checks."""
+        language = language or self._detect_language(code_diff)
+        if self._is_trivial_diff(code_diff, language):
+            return dict(_SKIPPED_INTENT_RESULT)
+        
+        chunks = _compress_diff(code_diff)
+        progress = on_progress if len(chunks) == 1 else None
+        results = await asyncio.gather(*(
+            self._acomplete(
+                self._intent_messages(intent_message, chunk, language),
+                temperature=0.3,
+                max_tokens=INTENT_MAX_TOKENS,
+                error_defaults=_INTENT_ERROR_DEFAULTS,
+                on_progress=progress
             )
+            for chunk in chunks
+        ))
+        
+        if len(results) == 1:
+            return results[0]
+        return _merge_intent_results(results, [len(chunk) for chunk in chunks])
+    
+    def check_vulnerabilities(self, code_diff, on_progress=None, language=None):
+        """
+        Check code changes for security vulnerabilities.
+        
+        Diffs over MAX_DIFF_TOKENS are scanned in chunks concurrently and
+        the results merged.
+        
+        Args:
+            code_diff: Git diff of the changes
+            on_progress: Optional callback(field, value) for early results
+            language: Language of the diff, detected when not given
             
-            result = json.loads(response.choices[0].message.content)
-            return result
+        Returns:
+            dict: Vulnerability analysis results
+        """
+        language = language or self._detect_language(code_diff)
+        if self._is_trivial_diff(code_diff, language):
+            return dict(_SKIPPED_VULNERABILITY_RESULT)
         
-        except json.JSONDecodeError as e:
+        chunks = _compress_diff(code_diff)
+        progress = on_progress if len(chunks) == 1 else None
+        results = _map_chunks(
+            lambda chunk: self._complete(
+                self._vulnerability_messages(chunk, language),
+                temperature=0.1,  # Lower temperature for more conservative security analysis
+                max_tokens=VULNERABILITY_MAX_TOKENS,
+                error_defaults=_VULNERABILITY_ERROR_DEFAULTS,
+                on_progress=progress
+            ),
+            chunks
+        )
+        
+        if len(results) == 1:
+            return results[0]
+        return _merge_vulnerability_results(results)
+    
+    async def acheck_vulnerabilities(self, code_diff, on_progress=None, language=None):
+        """Async variant of check_vulnerabilities, for running alongside other checks."""
+        language = language or self._detect_language(code_diff)
+        if self._is_trivial_diff(code_diff, language):
+            return dict(_SKIPPED_VULNERABILITY_RESULT)
+        
+        chunks = _compress_diff(code_diff)
+        progress = on_progress if len(chunks) == 1 else None
+        results = await asyncio.gather(*(
+            self._acomplete(
+                self._vulnerability_messages(chunk, language),
+                temperature=0.1,
+                max_tokens=VULNERABILITY_MAX_TOKENS,
+                error_defaults=_VULNERABILITY_ERROR_DEFAULTS,
+                on_progress=progress
+            )
+            for chunk in chunks
+        ))
+        
+        if len(results) == 1:
+            return results[0]
+        return _merge_vulnerability_results(results)
+    
+    def analyze(self, intent_message, code_diff, on_progress=None, language=None):
+        """
+        Validate intent alignment and scan for vulnerabilities in one request.
+        
+        The diff and its context are sent once and both rubrics are answered
+        in a single completion, saving a round-trip and the duplicated
+        prompt tokens of calling validate_intent and check_vulnerabilities.
+        Diffs over MAX_DIFF_TOKENS are analyzed in chunks concurrently.
+        
+        Args:
+            intent_message: The developer's stated intent
+            code_diff: Git diff of the changes
+            on_progress: Optional callback(field, value) for early results
+            language: Language of the diff, detected when not given
+            
+        Returns:
+            dict: {'alignment': <validate_intent result>,
+                   'security': <check_vulnerabilities result>}
+        """
+        language = language or self._detect_language(code_diff)
+        if self._is_trivial_diff(code_diff, language):
             return {
-                'error': f'JSON parsing error: {str(e)}',
-                'overall_severity': 'NONE',
-                'confidence': 0
+                'alignment': dict(_SKIPPED_INTENT_RESULT),
+                'security': dict(_SKIPPED_VULNERABILITY_RESULT)
             }
-        except Exception as e:
+        
+        chunks = _compress_diff(code_diff)
+        progress = on_progress if len(chunks) == 1 else None
+        results = _map_chunks(
+            lambda chunk: self._split_analysis(self._complete(
+                self._analysis_messages(intent_message, chunk, language),
+                temperature=0.1,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                error_defaults={},
+                on_progress=progress
+            )),
+            chunks
+        )
+        
+        if len(results) == 1:
+            return results[0]
+        return {
+            'alignment': _merge_intent_results(
+                [r['alignment'] for r in results], [len(chunk) for chunk in chunks]
+            ),
+            'security': _merge_vulnerability_results([r['security'] for r in results])
+        }
+    
+    def _split_analysis(self, result):
+        """Split a combined analysis response into its two results."""
+        if 'error' in result:
             return {
-                'error': str(e),
-                'overall_severity': 'NONE',
-                'confidence': 0
+                'alignment': {'error': result['error'], **_INTENT_ERROR_DEFAULTS},
+                'security': {'error': result['error'], **_VULNERABILITY_ERROR_DEFAULTS}
             }
+        
+        alignment = result.get('alignment')
+        if not isinstance(alignment, dict):
+            alignment = {'error': 'Missing alignment result in response', **_INTENT_ERROR_DEFAULTS}
+        security = result.get('security')
+        if not isinstance(security, dict):
+            security = {'error': 'Missing security result in response', **_VULNERABILITY_ERROR_DEFAULTS}
+        
+        return {'alignment': alignment, 'security': security}
+    
+    def _intent_messages(self, intent_message, code_diff, language=None):
+        """Build the chat messages for intent alignment validation."""
+        language = language or self._detect_language(code_diff)
+        history_context = self._history_context()
+        
+        prompt = f"""Language Detected: {language}
+Developer's Stated Intent: "{intent_message}"{history_context}
+
+Code Changes (Git Diff):
+{code_diff}"""
+        
+        return [
+            {"role": "system", "content": _VALIDATE_SYSTEM},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _vulnerability_messages(self, code_diff, language=None):
+        """Build the chat messages for the security vulnerability scan."""
+        # Detect language for context-specific scanning
+        language = language or self._detect_language(code_diff)
+        lang_context = self._get_language_context(language)
+        
+        prompt = f"""Language: {language}
+Language-Specific Context: {lang_context}
+
+Code Changes (Git Diff):
+{code_diff}"""
+        
+        return [
+            {"role": "system", "content": _SECURITY_SYSTEM},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _analysis_messages(self, intent_message, code_diff, language=None):
+        """Build the chat messages for the combined alignment and security analysis."""
+        language = language or self._detect_language(code_diff)
+        lang_context = self._get_language_context(language)
+        history_context = self._history_context()
+        
+        prompt = f"""Language Detected: {language}
+Language-Specific Context: {lang_context}
+Developer's Stated Intent: "{intent_message}"{history_context}
+
+Code Changes (Git Diff):
+{code_diff}"""
+        
+        return [
+            {"role": "system", "content": _ANALYZE_SYSTEM},
+            {"role": "user", "content": prompt}
+        ]
+
+# Validators shared per process, keyed by their options
+_validators = {}
+
+
+def get_validator(use_cache=True, skip_trivial=False):
+    """
+    Get a process-wide AIValidator for the given options.
+    
+    Reusing the validator keeps its HTTP connections alive between
+    requests instead of paying a new TLS handshake each time.
+    """
+    key = (use_cache, skip_trivial)
+    if key not in _validators:
+        _validators[key] = AIValidator(use_cache=use_cache, skip_trivial=skip_trivial)
+    return _validators[key]
@@ -1,14 +1,32 @@
 """CLI commands for intent tracking."""
 
 import click
-import json
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from .utils import get_intent_dir, get_current_intent, save_intent, get_git_diff
-from .ai_validator import AIValidator
 from .install_hooks import install_hooks
 
 
+_UTC = timezone.utc
+
+
+def _now_iso():
+    """Get the current UTC time as an ISO 8601 string with seconds precision."""
+    return datetime.now(_UTC).isoformat(timespec='seconds')
+
+
+_PROGRESS_LABELS = {
+    'score': 'Alignment score',
+    'alignment': 'Alignment',
+    'overall_severity': 'Security severity',
+}
+
+
+def _echo_progress(field, value):
+    """Show a key result as soon as it arrives in the AI response stream."""
+    click.echo(f"     {_PROGRESS_LABELS.get(field, field)}: {value}")
+
+
 @click.group()
 def cli():
     """AI Intent Tracker - Record and verify your coding intentions."""
@@ -32,7 +50,7 @@ def start(intent_message):
     # Create new intent
     intent_data = {
         'message': intent_message,
-        'started_at': datetime.now().isoformat(),
+        'started_at': _now_iso(),
         'status': 'active',
         'commits': []
     }
@@ -45,7 +63,9 @@ def start(intent_message):
 @click.option('-m', '--message', required=True, help='Commit message')
 @click.option('--validate/--no-validate', default=True, help='Validate intent with AI')
 @click.option('--scan-security/--no-scan-security', default=True, help='Scan for security vulnerabilities')
-def commit(message, validate, scan_security):
+@click.option('--cache/--no-cache', default=True, help='Reuse cached AI results for unchanged diffs')
+@click.option('--force-ai', is_flag=True, help='Run AI checks even for docs-only or whitespace changes')
+def commit(message, validate, scan_security, cache, force_ai):
     """Commit changes with intent verification and security scanning."""
     current_intent = get_current_intent()
     
@@ -65,18 +85,39 @@ def commit(message, validate, scan_security):
     
     if validate or scan_security:
         try:
-            validator = AIValidator()
+            # Imported here so commands that never call the AI start faster
+            from .ai_validator import get_validator
+            validator = get_validator(use_cache=cache, skip_trivial=not force_ai)
             click.echo("\n🤖 Analyzing changes with AI...")
             
-            # Validate intent alignment
             if validate:
                 click.echo("   → Checking intent alignment...")
-                validation_result = validator.validate_intent(current_intent['message'], diff)
-                
-                if 'error' not in validation_result:
+            if scan_security:
+                click.echo("   → Scanning for vulnerabilities...")
+            
+            # Both checks share the same diff, so answer them in one request
+            if validate and scan_security:
+                analysis = validator.analyze(current_intent['message'], diff, on_progress=_echo_progress)
+                validation_result = analysis['alignment']
+                vulnerability_result = analysis['security']
+            elif validate:
+                validation_result = validator.validate_intent(
+                    current_intent['message'], diff, on_progress=_echo_progress
+                )
+            else:
+                vulnerability_result = validator.check_vulnerabilities(diff, on_progress=_echo_progress)
+            
+            # Validate intent alignment
+            if validate:
+                if validation_result.get('skipped'):
+                    click.echo(f"\n📊 Intent alignment check skipped: {validation_result['skipped']} (use --force-ai to run it)")
+                elif 'error' not in validation_result:
                     score = validation_result.get('score', 0)
                     click.echo(f"\n📊 Intent Alignment Score: {score}/10")
                     
+                    if validation_result.get('partial_error'):
+                        click.secho(f"⚠️  Partial analysis: {validation_result['partial_error']}", fg='yellow')
+                    
                     if score < 5:
                         click.secho("⚠️  LOW ALIGNMENT WARNING", fg='red', bold=True)
                     elif score < 7:
@@ -92,13 +133,15 @@ def commit(message, validate, scan_security):
             
             # Security vulnerability scan
             if scan_security:
-                click.echo("\n   → Scanning for vulnerabilities...")
-                vulnerability_result = validator.check_vulnerabilities(diff)
-                
-                if 'error' not in vulnerability_result:
+                if vulnerability_result.get('skipped'):
+                    click.echo(f"\n🔒 Security scan skipped: {vulnerability_result['skipped']} (use --force-ai to run it)")
+                elif 'error' not in vulnerability_result:
                     severity = vulnerability_result.get('severity', 'NONE')
                     click.echo(f"\n🔒 Security Severity: {severity}")
                     
+                    if vulnerability_result.get('partial_error'):
+                        click.secho(f"⚠️  Partial scan: {vulnerability_result['partial_error']}", fg='yellow')
+                    
                     if severity in ['HIGH', 'CRITICAL']:
                         click.secho(f"⚠️  {severity} SEVERITY VULNERABILITIES FOUND!", fg='red', bold=True)
                     elif severity == 'MEDIUM':
@@ -128,7 +171,7 @@ def commit(message, validate, scan_security):
     # Record the commit
     commit_data = {
         'message': message,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': _now_iso(),
         'validation': validation_result,
         'security': vulnerability_result
     }
@@ -151,7 +194,7 @@ def close():
         return
     
     current_intent['status'] = 'closed'
-    current_intent['closed_at'] = datetime.now().isoformat()
+    current_intent['closed_at'] = _now_iso()
     save_intent(current_intent)
     
     # Generate summary
@@ -7,24 +7,51 @@ import stat
 from pathlib import Path
 
 
+def _find_git_dir(start=None):
+    """
+    Find the git directory by walking up from start (default: cwd).
+    
+    Worktrees and submodules have a .git file with a "gitdir:" line
+    pointing at the real git directory; that target is returned.
+    
+    Returns:
+        Path: The git directory, or None if not inside a repository
+    """
+    if os.environ.get('GIT_DIR'):
+        return Path(os.environ['GIT_DIR']).resolve()
+    
+    path = Path(start or Path.cwd()).resolve()
+    for directory in (path, *path.parents):
+        dot_git = directory / '.git'
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            content = dot_git.read_text().strip()
+            if content.startswith('gitdir:'):
+                return (directory / content[len('gitdir:'):].strip()).resolve()
+    
+    return None
+
+
+def _get_common_dir(git_dir):
+    """Get the directory holding shared state such as hooks for a git directory."""
+    # Linked worktrees record the main repository's git directory in "commondir"
+    commondir_file = git_dir / 'commondir'
+    if commondir_file.is_file():
+        return (git_dir / commondir_file.read_text().strip()).resolve()
+    return git_dir
+
+
 @click.command()
 def install_hooks():
     """Install git hooks for automatic validation."""
     
     # Find git root
-    try:
-        import subprocess
-        result = subprocess.run(
-            ['git', 'rev-parse', '--git-dir'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        git_dir = Path(result.stdout.strip())
-        hooks_dir = git_dir / 'hooks'
-    except:
+    git_dir = _find_git_dir()
+    if git_dir is None:
         click.secho("[ERROR] Not in a git repository!", fg='red')
         return 1
+    hooks_dir = _get_common_dir(git_dir) / 'hooks'
     
     # Get the source hooks directory
     package_dir = Path(__file__).parent.parent
@@ -2,10 +2,63 @@
 
 import os
 import re
+import functools
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import ai_cache
+from .utils import json_loads, load_env
 
-load_dotenv()
+# (connect, read) timeouts in seconds for Jira API requests
+JIRA_TIMEOUT = (5, 30)
+
+# Issue fields read by get_issue; requesting only these keeps payloads small
+_ISSUE_FIELDS = [
+    'summary', 'description', 'issuetype', 'status', 'priority',
+    'assignee', 'labels', 'components',
+]
+
+# How long issues cached on disk by requests-cache stay fresh
+JIRA_CACHE_SECONDS = 300
+
+# Most issues the search endpoint returns per request
+_SEARCH_BATCH_SIZE = 100
+
+# Parsed issues per Jira site, shared by every client in the process so a
+# story fetched once is not requested again on later validations
+_issue_caches = {}
+
+# Jira issue key: PROJECT-123 format (uppercase letters, dash, numbers)
+_JIRA_ID_RE = re.compile(r'\b([A-Z]{2,10}-\d+)\b')
+
+# ADF nodes whose children are flattened into separate lines
+_ADF_CONTAINER_TYPES = frozenset(['doc', 'heading', 'bulletList', 'orderedList', 'listItem'])
+
+# Common acceptance criteria headings, matched in a single pass; the
+# heading must start its line, after optional Jira or Markdown markup
+# ("h3.", "##", "*"), so words like "HVAC" or "Mac" never match
+_AC_RE = re.compile(
+    r'^[ \t]*(?:h\d\.|#+|\*+)?[ \t]*(?:Acceptance Criteria|AC|Criteria)\b[*:]*[ \t]*\n(.+?)(?=\n\n|\Z)',
+    re.IGNORECASE | re.DOTALL | re.MULTILINE
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _extract_jira_id(commit_message):
+    """Find the first Jira issue key in a commit message, memoized per message."""
+    match = _JIRA_ID_RE.search(commit_message)
+    
+    if match:
+        return match.group(1)
+    return None
+
+
+def _paragraph_text(paragraph):
+    """Join the text nodes of an ADF paragraph with spaces."""
+    return ' '.join(
+        content.get('text', '') for content in paragraph.get('content') or []
+        if content.get('type') == 'text'
+    )
 
 
 class JiraClient:
@@ -13,6 +66,7 @@ class JiraClient:
     
     def __init__(self):
         """Initialize Jira client with credentials from environment."""
+        load_env()
         self.jira_url = os.getenv('JIRA_URL')  # e.g., https://yourcompany.atlassian.net
         self.jira_email = os.getenv('JIRA_EMAIL')
         self.jira_api_token = os.getenv('JIRA_API_TOKEN')
@@ -23,12 +77,44 @@ class JiraClient:
             )
         
         self.jira_url = self.jira_url.rstrip('/')
-        self.session = requests.Session()
+        
+        try:
+            # Optional, shares fetched issues between processes such as CI
+            # re-runs; imported here as it doubles this module's import time
+            from requests_cache import CachedSession
+        except ImportError:
+            self.session = requests.Session()
+        else:
+            # Stored with the AI cache, which CI persists between runs. Jira
+            # sends Cache-Control: no-store, so only expire_after applies.
+            self.session = CachedSession(
+                str(ai_cache.get_cache_dir() / 'jira_cache.sqlite'),
+                expire_after=JIRA_CACHE_SECONDS,
+                allowable_methods=('GET',)
+            )
+        
         self.session.auth = (self.jira_email, self.jira_api_token)
         self.session.headers.update({
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         })
+        
+        # Pool connections so all issues of a PR share one TLS session, and
+        # retry transient failures with backoff. The final failed response is
+        # returned rather than raised so get_issue reports its status code.
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            # The client only POSTs read-only searches, so those are safe to retry
+            allowed_methods=frozenset(['GET', 'POST']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self._issue_cache = _issue_caches.setdefault(self.jira_url, {})
     
     def extract_jira_id(self, commit_message):
         """
@@ -45,58 +131,94 @@ class JiraClient:
         Returns:
             str: Jira issue ID (e.g., "PROJ-123") or None
         """
-        # Pattern: PROJECT-123 format (uppercase letters, dash, numbers)
-        pattern = r'\b([A-Z]{2,10}-\d+)\b'
-        match = re.search(pattern, commit_message)
-        
-        if match:
-            return match.group(1)
-        return None
+        return _extract_jira_id(commit_message)
     
     def get_issue(self, issue_key):
         """
         Fetch Jira issue details.
         
+        Issues are cached for the lifetime of the process and shared by all
+        clients of the same Jira site, so repeated lookups of the same key
+        do not hit the API again. Use invalidate() to refetch.
+        
         Args:
             issue_key: Jira issue key (e.g., "PROJ-123")
             
         Returns:
             dict: Issue details including summary, description, etc.
         """
+        issue = self._issue_cache.get(issue_key)
+        if issue is None:
+            issue = self._fetch_issue(issue_key)
+            self._issue_cache[issue_key] = issue
+        return issue
+    
+    def get_issues(self, issue_keys):
+        """
+        Fetch several Jira issues with one search request per 100 keys.
+        
+        Fetched issues are cached like get_issue() results. JQL rejects the
+        whole query when any key is unknown or inaccessible, so a failed
+        search is not an error: the affected issues are simply not returned
+        and get_issue() can fetch them one by one and report why.
+        
+        Args:
+            issue_keys: Jira issue keys (e.g., ["PROJ-123", "PROJ-124"])
+            
+        Returns:
+            dict: Issue details by key, for the issues that could be fetched
+        """
+        keys = list(dict.fromkeys(issue_keys))
+        missing = [key for key in keys if key not in self._issue_cache]
+        url = f"{self.jira_url}/rest/api/3/search/jql"
+        
+        for start in range(0, len(missing), _SEARCH_BATCH_SIZE):
+            batch = missing[start:start + _SEARCH_BATCH_SIZE]
+            try:
+                response = self.session.post(
+                    url,
+                    json={
+                        'jql': f"key in ({', '.join(batch)})",
+                        'fields': _ISSUE_FIELDS,
+                        'maxResults': len(batch),
+                    },
+                    timeout=JIRA_TIMEOUT
+                )
+                response.raise_for_status()
+                
+                for data in json_loads(response.content).get('issues') or []:
+                    self._issue_cache[data.get('key')] = self._parse_issue(data, data.get('key'))
+            
+            except (requests.exceptions.RequestException, ValueError):
+                # Left uncached for get_issue() to fetch and report individually
+                continue
+        
+        return {key: self._issue_cache[key] for key in keys if key in self._issue_cache}
+    
+    def invalidate(self, issue_key=None):
+        """Drop a cached issue, or every cached issue if no key is given."""
+        if issue_key is None:
+            self._issue_cache.clear()
+        else:
+            self._issue_cache.pop(issue_key, None)
+    
+    def _fetch_issue(self, issue_key):
+        """Fetch and parse a Jira issue from the API."""
         url = f"{self.jira_url}/rest/api/3/issue/{issue_key}"
         
         try:
-            response = self.session.get(url)
+            response = self.session.get(
+                url, params={'fields': ','.join(_ISSUE_FIELDS)}, timeout=JIRA_TIMEOUT
+            )
             response.raise_for_status()
             
-            data = response.json()
+            # Decode the raw bytes directly, with orjson when available
+            data = json_loads(response.content)
             
             if not data:
                 raise ValueError(f"Empty response from Jira API for issue {issue_key}")
             
-            # Extract relevant fields
-            fields = data.get('fields', {})
-            
-            if not fields:
-                raise ValueError(f"No fields found in Jira issue {issue_key}")
-            
-            # Helper to safely get nested values
-            def safe_get(obj, key, default=''):
-                val = obj.get(key) if obj else None
-                return val if val is not None else default
-            
-            return {
-                'key': data.get('key'),
-                'summary': safe_get(fields, 'summary'),
-                'description': self._extract_description(fields.get('description')),
-                'issue_type': safe_get(fields.get('issuetype'), 'name'),
-                'status': safe_get(fields.get('status'), 'name'),
-                'priority': safe_get(fields.get('priority'), 'name', 'None'),
-                'assignee': safe_get(fields.get('assignee'), 'displayName', 'Unassigned'),
-                'acceptance_criteria': self._extract_acceptance_criteria(fields.get('description')),
-                'labels': fields.get('labels', []),
-                'components': [c.get('name', '') for c in (fields.get('components') or [])],
-            }
+            return self._parse_issue(data, issue_key)
         
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
@@ -120,6 +242,34 @@ class JiraClient:
         except Exception as e:
             raise ValueError(f"Error fetching Jira issue: {str(e)}")
     
+    def _parse_issue(self, data, issue_key):
+        """Reduce an issue from the API to the fields used for validation."""
+        # Extract relevant fields
+        fields = data.get('fields', {})
+        
+        if not fields:
+            raise ValueError(f"No fields found in Jira issue {issue_key}")
+        
+        # Missing and null objects both read as empty
+        description = fields.get('description')
+        issue_type = fields.get('issuetype') or {}
+        status = fields.get('status') or {}
+        priority = fields.get('priority') or {}
+        assignee = fields.get('assignee') or {}
+        
+        return {
+            'key': data.get('key'),
+            'summary': fields.get('summary') or '',
+            'description': self._extract_description(description),
+            'issue_type': issue_type.get('name') or '',
+            'status': status.get('name') or '',
+            'priority': priority.get('name') or 'None',
+            'assignee': assignee.get('displayName') or 'Unassigned',
+            'acceptance_criteria': self._extract_acceptance_criteria(description),
+            'labels': fields.get('labels', []),
+            'components': [c.get('name', '') for c in (fields.get('components') or [])],
+        }
+    
     def _extract_description(self, description_obj):
         """Extract plain text from Jira description (Atlassian Document Format)."""
         if not description_obj:
@@ -133,28 +283,32 @@ class JiraClient:
     
     def _adf_to_text(self, adf_obj):
         """Convert Atlassian Document Format to plain text."""
-        if not isinstance(adf_obj, dict):
-            return str(adf_obj)
+        # Most descriptions are a document of plain paragraphs; flatten those
+        # directly and keep the general walk for headings and lists
+        if isinstance(adf_obj, dict) and adf_obj.get('type') == 'doc':
+            blocks = adf_obj.get('content') or []
+            if all(isinstance(block, dict) and block.get('type') == 'paragraph' for block in blocks):
+                return '\n'.join(filter(None, map(_paragraph_text, blocks)))
         
+        # Walk the tree with an explicit stack instead of recursion, collecting
+        # the text of each paragraph and text node into a single list
         text_parts = []
+        stack = [adf_obj]
         
-        if adf_obj.get('type') == 'doc':
-            for content in adf_obj.get('content', []):
-                text_parts.append(self._adf_to_text(content))
-        
-        elif adf_obj.get('type') == 'paragraph':
-            para_text = []
-            for content in adf_obj.get('content', []):
-                if content.get('type') == 'text':
-                    para_text.append(content.get('text', ''))
-            text_parts.append(' '.join(para_text))
-        
-        elif adf_obj.get('type') == 'text':
-            text_parts.append(adf_obj.get('text', ''))
-        
-        elif adf_obj.get('type') in ['heading', 'bulletList', 'orderedList', 'listItem']:
-            for content in adf_obj.get('content', []):
-                text_parts.append(self._adf_to_text(content))
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, dict):
+                text_parts.append(str(node))
+                continue
+            
+            node_type = node.get('type')
+            if node_type == 'paragraph':
+                text_parts.append(_paragraph_text(node))
+            elif node_type == 'text':
+                text_parts.append(node.get('text', ''))
+            elif node_type in _ADF_CONTAINER_TYPES:
+                # Push children reversed so they are popped in document order
+                stack.extend(reversed(node.get('content') or []))
         
         return '\n'.join(filter(None, text_parts))
     
@@ -163,16 +317,9 @@ class JiraClient:
         text = self._extract_description(description_obj)
         
         # Look for common acceptance criteria patterns
-        patterns = [
-            r'Acceptance Criteria:?\s*\n(.+?)(?=\n\n|\Z)',
-            r'AC:?\s*\n(.+?)(?=\n\n|\Z)',
-            r'Criteria:?\s*\n(.+?)(?=\n\n|\Z)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if match:
-                return match.group(1).strip()
+        match = _AC_RE.search(text)
+        if match:
+            return match.group(1).strip()
         
         return ""
     
@@ -220,3 +367,20 @@ class JiraClient:
                    "Commit message must include Jira issue ID (e.g., PROJ-123)")
         
         return (True, jira_id, None)
+
+
+# Client shared per process, created on first use
+_client = None
+
+
+def get_jira_client():
+    """
+    Get a process-wide JiraClient.
+    
+    Sharing one client lets every caller, including worker threads,
+    reuse its pooled HTTP session instead of opening new connections.
+    """
+    global _client
+    if _client is None:
+        _client = JiraClient()
+    return _client
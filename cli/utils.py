@@ -1,8 +1,23 @@
 """Utility functions for intent tracking."""
 
+import os
 import json
 from pathlib import Path
-from datetime import datetime
+import tempfile
+import time
+
+try:
+    # Optional, several times faster than the stdlib json module
+    import orjson
+except ImportError:
+    orjson = None
+
+_env_loaded = False
+
+# The umask can only be read by setting it, so it is read once at import,
+# before any threads write files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 def get_intent_dir():
@@ -10,6 +25,36 @@ def get_intent_dir():
     return Path.cwd() / '.intent'
 
 
+def load_env():
+    """Load variables from a .env file into the environment, once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        # Deferred so commands that never read the environment skip the import
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def json_loads(data):
+    """Decode JSON from str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj):
+    """Encode an object as indented UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def load_json_file(path):
+    """Read and decode a JSON file."""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
 def get_current_intent_file():
     """Get the path to the current intent file."""
     intent_dir = get_intent_dir()
@@ -23,8 +68,7 @@ def get_current_intent():
     if not intent_file.exists():
         return None
     
-    with open(intent_file, 'r') as f:
-        intent_data = json.load(f)
+    intent_data = load_json_file(intent_file)
     
     if intent_data.get('status') == 'closed':
         return None
@@ -32,26 +76,72 @@ def get_current_intent():
     return intent_data
 
 
+def _write_atomic(path, data):
+    """Write bytes to a file so readers never see it partially written."""
+    # A unique temp file per call, since threads of one process may write
+    # the same path at once; it is removed if the write does not complete
+    tmp_file = tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'{path.name}.', suffix='.tmp', delete=False)
+    try:
+        with tmp_file:
+            tmp_file.write(data)
+        # Temp files are created 0600; give it the mode open() would have
+        os.chmod(tmp_file.name, 0o666 & ~_UMASK)
+        os.replace(tmp_file.name, path)
+    except BaseException:
+        os.unlink(tmp_file.name)
+        raise
+
+
 def save_intent(intent_data):
     """Save intent data to file."""
     intent_dir = get_intent_dir()
     intent_dir.mkdir(exist_ok=True)
     
+    payload = json_dumps(intent_data)
+    
     # Save as current intent
-    current_file = get_current_intent_file()
-    with open(current_file, 'w') as f:
-        json.dump(intent_data, f, indent=2)
+    _write_atomic(get_current_intent_file(), payload)
     
     # Also save to history if closed
     if intent_data.get('status') == 'closed':
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
         history_file = intent_dir / f'intent_{timestamp}.json'
-        with open(history_file, 'w') as f:
-            json.dump(intent_data, f, indent=2)
+        _write_atomic(history_file, payload)
+
+
+def open_repository(path=None):
+    """
+    Open the git repository containing path (default: cwd) with pygit2.
+    
+    Returns:
+        pygit2.Repository: The repository, or None if pygit2 is not
+        installed or path is not inside a repository
+    """
+    try:
+        # Optional; imported on first use since most commands never need it
+        import pygit2
+    except ImportError:
+        return None
+    
+    repo_path = pygit2.discover_repository(str(path or Path.cwd()))
+    if repo_path is None:
+        return None
+    return pygit2.Repository(repo_path)
 
 
 def get_git_diff():
     """Get the current git diff."""
+    repo = open_repository()
+    if repo is not None:
+        try:
+            # Staged changes read in-process, without spawning git
+            diff = repo.diff('HEAD', cached=True)
+            diff.find_similar()
+            return diff.patch or ''
+        except Exception:
+            # e.g. no commits yet; let git handle the edge cases
+            pass
+    
     import subprocess
     try:
         result = subprocess.run(
@@ -0,0 +1,428 @@
+"""
+GitHub Actions script to validate PR commits against Jira stories.
+"""
+
+import os
+import sys
+import itertools
+import subprocess
+import requests
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    # Optional, reads commits and diffs without spawning git
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+from .jira_client import _JIRA_ID_RE, get_jira_client
+from .ai_validator import get_validator
+from .utils import json_dumps, open_repository
+
+
+# Upper bound on stories validated at the same time
+MAX_WORKERS = 8
+
+# Most commits scanned for Jira IDs, so comparing against the wrong base
+# cannot walk the whole history; raise INTENT_MAX_COMMITS for longer PRs
+MAX_COMMITS = 500
+
+# Default cap on the diff sent to the AI per story, so a huge PR cannot
+# multiply the number of model calls; INTENT_MAX_DIFF_BYTES=0 disables it
+MAX_DIFF_BYTES = 50_000
+
+# Result lists shown under each story, with their headings
+_COMMENT_SECTIONS = (
+    ('matches', 'What Aligns'),
+    ('discrepancies', 'Discrepancies'),
+    ('suggestions', 'Suggestions'),
+)
+
+# Shared GitHub API session: keeps the connection alive between requests and
+# retries refused connections and rate limiting. Read timeouts and server
+# errors are not retried because the comment may already have been created.
+_GITHUB_SESSION = requests.Session()
+_GITHUB_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=(429,),
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False
+    )
+))
+
+
+def _commit_subjects(repo, base_ref, head_sha, limit):
+    """Yield the subjects of up to limit non-merge commits in base_ref..head_sha, like %s in git log."""
+    head = repo.revparse_single(head_sha).peel(pygit2.Commit)
+    walker = repo.walk(head.id)
+    walker.hide(repo.revparse_single(f'origin/{base_ref}').peel(pygit2.Commit).id)
+    non_merges = (commit for commit in walker if len(commit.parent_ids) < 2)
+    for commit in itertools.islice(non_merges, limit):
+        # The subject is the first paragraph of the message joined into one line
+        yield commit.message.strip().split('\n\n', 1)[0].replace('\n', ' ')
+
+
+def _git_log_subjects(base_ref, head_sha, limit):
+    """Yield the subjects of up to limit non-merge commits from git log as it prints them."""
+    with subprocess.Popen(
+        ['git', 'log', '--no-merges', '-n', str(limit), f'origin/{base_ref}..{head_sha}', '--pretty=format:%s'],
+        stdout=subprocess.PIPE,
+        text=True
+    ) as process:
+        yield from process.stdout
+    
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+
+def _find_jira_ids(subjects, limit):
+    """Collect the distinct Jira IDs mentioned in the first limit commit subjects."""
+    jira_ids = set()
+    for count, subject in enumerate(subjects, 1):
+        if count > limit:
+            print(f"Warning: PR has more than {limit} commits; only the latest {limit} were scanned")
+            break
+        jira_ids.update(match.group(1) for match in _JIRA_ID_RE.finditer(subject))
+    return jira_ids
+
+
+def _pr_diff(repo, base_ref, head_sha):
+    """Get the diff of head_sha against its merge base with base_ref."""
+    head = repo.revparse_single(head_sha).peel(pygit2.Commit)
+    base = repo.revparse_single(f'origin/{base_ref}').peel(pygit2.Commit)
+    diff = repo.diff(repo[repo.merge_base(base.id, head.id)], head)
+    diff.find_similar()
+    return diff.patch or ''
+
+
+def extract_jira_ids(base_ref, head_sha, repo=None):
+    """Extract the distinct Jira IDs from PR commits, sorted."""
+    # Subjects are scanned one at a time as they are read, so the log of
+    # a long-lived branch is never held in memory as a whole. One commit
+    # past the cap is read to tell whether the cap was hit.
+    limit = int(os.getenv('INTENT_MAX_COMMITS', MAX_COMMITS))
+    
+    jira_ids = None
+    if repo is not None:
+        try:
+            jira_ids = _find_jira_ids(_commit_subjects(repo, base_ref, head_sha, limit + 1), limit)
+        except Exception as e:
+            print(f"Falling back to git log: {e}")
+    
+    if jira_ids is None:
+        jira_ids = _find_jira_ids(_git_log_subjects(base_ref, head_sha, limit + 1), limit)
+    
+    # Sorted so the report lists stories in the same order on every run;
+    # set iteration order changes between processes
+    jira_ids = sorted(jira_ids)
+    
+    print(f"Found Jira IDs: {jira_ids}")
+    return jira_ids
+
+
+def get_pr_diff(base_ref, head_sha, repo=None):
+    """Get the PR diff against its merge base with base_ref."""
+    if repo is not None:
+        try:
+            return _pr_diff(repo, base_ref, head_sha)
+        except Exception as e:
+            print(f"Falling back to git diff: {e}")
+    
+    diff_result = subprocess.run(
+        ['git', 'diff', f'origin/{base_ref}...{head_sha}'],
+        capture_output=True,
+        text=True
+    )
+    return diff_result.stdout
+
+
+def _truncate_diff(diff, max_bytes):
+    """
+    Shorten a diff to about max_bytes characters, keeping every file.
+    
+    Files smaller than their share of the budget are kept whole and the
+    rest is split evenly between the larger ones, each cut at a line
+    boundary so its header and first hunks survive.
+    """
+    if not max_bytes or len(diff) <= max_bytes:
+        return diff
+    
+    files = diff.split('\ndiff --git ')
+    files[1:] = ['diff --git ' + file for file in files[1:]]
+    
+    budget = max_bytes
+    kept = list(files)
+    by_size = sorted(range(len(files)), key=lambda i: len(files[i]))
+    for position, index in enumerate(by_size):
+        share = budget // (len(files) - position)
+        if len(files[index]) > share:
+            kept[index] = files[index][:share].rsplit('\n', 1)[0] + '\n... truncated ...'
+        budget -= len(kept[index])
+    
+    return '\n'.join(kept)
+
+
+def validate_story(jira_client, validator, jira_id, diff, log=print):
+    """
+    Validate the PR diff against one Jira story.
+    
+    Progress is reported through log, so concurrent validations can
+    buffer their output instead of interleaving it.
+    """
+    log(f"\n=== Validating {jira_id} ===")
+    
+    try:
+        # Fetch Jira issue
+        issue = jira_client.get_issue(jira_id)
+        log(f"Story: {issue['summary']}")
+        
+        # Validate with AI
+        intent_text = jira_client.format_issue_for_validation(issue)
+        validation = validator.validate_intent(intent_text, diff)
+        
+        # Normalized once here so the report can use result['score'] as is
+        score = validation.get('score') or 0
+        
+        result = {
+            'jira_id': jira_id,
+            'summary': issue['summary'],
+            'score': score,
+            'confidence': validation.get('confidence', 0),
+            'status': validation.get('alignment', 'unknown'),
+            'key_functionality_present': validation.get('key_functionality_present', False),
+            'matches': validation.get('matches', []),
+            'discrepancies': validation.get('discrepancies', []),
+            'suggestions': validation.get('suggestions', [])
+        }
+        
+        log(f"Score: {score}/10")
+        
+        if validation.get('partial_error'):
+            result['partial_error'] = validation['partial_error']
+            log(f"WARNING: {validation['partial_error']}")
+        
+        if score < 3:
+            log(f"CRITICAL: Low alignment score!")
+        
+        return result
+    
+    except Exception as e:
+        log(f"Error validating {jira_id}: {e}")
+        return {
+            'jira_id': jira_id,
+            'error': str(e),
+            'score': 0
+        }
+
+
+def _validate_story_buffered(jira_client, validator, jira_id, diff):
+    """Validate one story, returning its result and the lines it logged."""
+    lines = []
+    result = validate_story(jira_client, validator, jira_id, diff, log=lines.append)
+    return result, lines
+
+
+def validate_commits(base_ref, head_sha):
+    """Validate all commits in PR against their Jira stories."""
+    # Read commits and diff in-process when pygit2 is available. The two are
+    # independent, so the diff is produced on a worker thread while the log
+    # is scanned; each side opens its own repository as pygit2 objects should
+    # not be shared between threads. A PR without Jira IDs still waits for
+    # the diff to finish, as the running read cannot be stopped.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        diff_future = executor.submit(lambda: get_pr_diff(base_ref, head_sha, open_repository()))
+        jira_ids = extract_jira_ids(base_ref, head_sha, open_repository())
+        
+        if not jira_ids:
+            print("No Jira IDs found in commits")
+            return {'results': [], 'critical_issues': False}
+        
+        diff = diff_future.result()
+    
+    # One client and validator serve every worker thread; both keep their
+    # HTTP connections pooled and are safe to share
+    jira_client = get_jira_client()
+    # AI responses are cached on disk by prompt hash, so a re-run of an
+    # unchanged PR skips the model; INTENT_CACHE=0 forces fresh answers
+    use_cache = os.environ.get('INTENT_CACHE', 'true').lower() in ['1', 'true', 'yes']
+    validator = get_validator(use_cache=use_cache)
+    
+    if not diff:
+        print("No code changes found")
+        return {'results': [], 'critical_issues': False}
+    
+    max_bytes = int(os.getenv('INTENT_MAX_DIFF_BYTES', MAX_DIFF_BYTES))
+    diff_for_ai = _truncate_diff(diff, max_bytes)
+    if len(diff_for_ai) < len(diff):
+        print(f"Diff truncated from {len(diff)} to {len(diff_for_ai)} characters for AI validation")
+    
+    # Fetch every story in one search; any that fail are retried one by
+    # one by get_issue, which reports the reason per story
+    jira_client.get_issues(jira_ids)
+    
+    # Stop at the first critical story instead of validating the rest
+    fail_fast = os.environ.get('INTENT_FAIL_FAST', '').lower() in ['1', 'true', 'yes']
+    
+    # Stories are independent and their Jira and AI calls are I/O-bound, so
+    # validate them concurrently, topping up a window of in-flight stories as
+    # each one finishes and printing its output as one block. Fail-fast only
+    # saves calls if each result is seen before the next story starts, so it
+    # validates one story at a time.
+    window = 1 if fail_fast else min(MAX_WORKERS, len(jira_ids))
+    queued = iter(jira_ids)
+    finished = {}
+    stop = False
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        in_flight = {
+            executor.submit(_validate_story_buffered, jira_client, validator, jira_id, diff_for_ai): jira_id
+            for jira_id in itertools.islice(queued, window)
+        }
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result, lines = future.result()
+                print('\n'.join(lines))
+                finished[in_flight.pop(future)] = result
+                stop = stop or (fail_fast and result['score'] < 3)
+            
+            if not stop:
+                for jira_id in itertools.islice(queued, len(done)):
+                    future = executor.submit(_validate_story_buffered, jira_client, validator, jira_id, diff_for_ai)
+                    in_flight[future] = jira_id
+    
+    # Report in jira_ids order, keeping every story that was validated
+    results = [finished[jira_id] for jira_id in jira_ids if jira_id in finished]
+    if len(results) < len(jira_ids):
+        print(f"Fail-fast: skipped {len(jira_ids) - len(results)} remaining stories")
+    
+    critical_issues = any(result['score'] < 3 for result in results)
+    
+    return {
+        'results': results,
+        'critical_issues': critical_issues
+    }
+
+
+def generate_pr_comment(validation_data):
+    """Generate markdown comment for PR."""
+    results = validation_data['results']
+    
+    if not results:
+        return "## Jira Story Validation Report\n\nNo Jira IDs found in commit messages."
+    
+    # Collect the pieces and join once instead of growing one string
+    parts = ["## Jira Story Validation Report\n\n"]
+    
+    # Summary totals, gathered while the stories are written
+    total_score = 0
+    critical = 0
+    
+    for result in results:
+        jira_id = result['jira_id']
+        
+        # Every result, including errors, carries a numeric score
+        total_score += result['score']
+        critical += result['score'] < 3
+        
+        if 'error' in result:
+            parts.append(f"### {jira_id}\n**Error:** {result['error']}\n\n")
+            continue
+        
+        score = result['score']
+        summary = result['summary']
+        status = result['status']
+        
+        parts.append(f"### {jira_id}: {summary}\n")
+        parts.append(f"**Alignment Score:** {score}/10 (Confidence: {result['confidence']}%)\n")
+        parts.append(f"**Status:** {status}\n")
+        parts.append(f"**Key Functionality Present:** {'Yes' if result['key_functionality_present'] else 'No'}\n\n")
+        
+        if result.get('partial_error'):
+            parts.append(f"**Warning:** {result['partial_error']}\n\n")
+        
+        for key, label in _COMMENT_SECTIONS:
+            items = result.get(key)
+            if items:
+                parts.append(f"**{label}:**\n")
+                parts.extend(f"- {item}\n" for item in items[:3])
+                parts.append("\n")
+    
+    # Summary
+    avg_score = total_score / len(results)
+    
+    parts.append("---\n### Summary\n")
+    parts.append(f"- **Average Score:** {avg_score:.1f}/10\n")
+    parts.append(f"- **Stories Validated:** {len(results)}\n")
+    parts.append(f"- **Critical Issues:** {critical}\n")
+    
+    return ''.join(parts)
+
+
+def post_pr_comment(comment, repo, pr_number, token):
+    """Post comment to GitHub PR."""
+    url = f"https://api.github.com/repos/{repo}/issues/{pr_number}/comments"
+    headers = {
+        'Authorization': f'token {token}',
+        'Accept': 'application/vnd.github.v3+json'
+    }
+    data = {'body': comment}
+    
+    response = _GITHUB_SESSION.post(url, headers=headers, json=data, timeout=10)
+    
+    if response.status_code == 201:
+        print("Successfully posted PR comment")
+    else:
+        print(f"Failed to post comment: {response.status_code}")
+        print(response.text)
+
+
+def main():
+    base_ref = os.getenv('GITHUB_BASE_REF')
+    head_sha = os.getenv('GITHUB_SHA')
+    github_token = os.getenv('GITHUB_TOKEN')
+    github_repo = os.getenv('GITHUB_REPOSITORY')
+    pr_number = os.getenv('PR_NUMBER')
+    
+    if not base_ref or not head_sha:
+        print("Error: GITHUB_BASE_REF and GITHUB_SHA required")
+        sys.exit(1)
+    
+    print(f"Validating PR: {base_ref}..{head_sha}")
+    
+    validation_data = validate_commits(base_ref, head_sha)
+    
+    # Save results
+    Path('validation_results.json').write_bytes(json_dumps(validation_data))
+    
+    # Generate PR comment
+    comment = generate_pr_comment(validation_data)
+    Path('pr_comment.md').write_text(comment, encoding='utf-8')
+    
+    # Post comment to PR if token available
+    if github_token and github_repo and pr_number:
+        post_pr_comment(comment, github_repo, pr_number, github_token)
+    else:
+        print("Skipping PR comment (missing GitHub credentials)")
+    
+    print("\n" + "="*60)
+    print("Validation Complete")
+    print("="*60)
+    
+    if validation_data['critical_issues']:
+        print("\nCRITICAL: Some stories have severe misalignment!")
+        sys.exit(1)
+    
+    print("\nAll validations passed!")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,13 @@
 """Setup script for AI Intent Tracker."""
 
-from setuptools import setup, find_packages
+from pathlib import Path
+from setuptools import setup
+
+
+def _long_description():
+    """Read the README next to this file for the package page."""
+    return (Path(__file__).parent / "README.md").read_text(encoding="utf-8")
 
-with open("README.md", "r", encoding="utf-8") as fh:
-    long_description = fh.read()
 
 setup(
     name="ai-intent-tracker",
@@ -11,10 +15,11 @@ setup(
     author="Santhosh Kumar Bethi",
     author_email="santhosh.bhethi@gmail.com@gmail.com",
     description="AI-powered validation tool that ensures code changes match Jira story requirements",
-    long_description=long_description,
+    long_description=_long_description(),
     long_description_content_type="text/markdown",
     url="https://github.com/santhoshbethi/intent_aware_git",
-    packages=find_packages(),
+    # Listed explicitly so builds do not walk the source tree
+    packages=["cli"],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -33,7 +38,7 @@ setup(
     install_requires=[
         "click>=8.0.0",
         "requests>=2.28.0",
-        "openai>=1.0.0",
+        "openai>=1.17.0",
         "python-dotenv>=0.19.0",
     ],
     extras_require={
@@ -41,11 +46,20 @@ setup(
             "pytest>=7.0.0",
             "pytest-cov>=3.0.0",
         ],
+        "speedups": [
+            "google-re2>=1.0",
+            "h2>=4.0",
+            "orjson>=3.9",
+            "pygit2>=1.14",
+            "requests-cache>=1.0",
+            "regex>=2023.0",
+        ],
     },
     entry_points={
         "console_scripts": [
             "intent=cli.commands:cli",
             "git-intent=cli.commands:cli",
+            "intent-validate=cli.validate_pr:main",
         ],
     },
 )
@@ -0,0 +1,44 @@
+"""Shared test fixtures."""
+
+import json
+import pytest
+
+
+class FakeIntentStore:
+    """In-memory stand-in for the .intent directory."""
+    
+    def __init__(self):
+        self.current = None
+        self.archived = []
+    
+    def save(self, intent_data):
+        """Store intent data, archiving it when closed like save_intent."""
+        # Round-trip through JSON so callers never share state with the store
+        self.current = json.dumps(intent_data)
+        if intent_data.get('status') == 'closed':
+            self.archived.append(self.current)
+    
+    def load(self):
+        """Load the active intent like get_current_intent."""
+        if self.current is None:
+            return None
+        
+        intent_data = json.loads(self.current)
+        if intent_data.get('status') == 'closed':
+            return None
+        return intent_data
+    
+    def history(self):
+        """Get every closed intent, oldest first."""
+        return [json.loads(data) for data in self.archived]
+
+
+@pytest.fixture
+def intent_store(tmp_path, monkeypatch):
+    """Keep the CLI's intent state in memory instead of on disk."""
+    store = FakeIntentStore()
+    monkeypatch.setattr('cli.commands.save_intent', store.save)
+    monkeypatch.setattr('cli.commands.get_current_intent', store.load)
+    # start still creates the directory, so keep it out of the working tree
+    monkeypatch.setattr('cli.commands.get_intent_dir', lambda: tmp_path / '.intent')
+    return store
@@ -0,0 +1,62 @@
+"""Tests for the AI response cache."""
+
+import os
+import time
+import pytest
+from cli import ai_cache
+
+
+@pytest.fixture
+def temp_cache_dir(tmp_path, monkeypatch):
+    """Create a temporary cache directory."""
+    cache_dir = tmp_path / 'ai_cache'
+    monkeypatch.setattr('cli.ai_cache.get_cache_dir', lambda: cache_dir)
+    return cache_dir
+
+
+def test_get_missing_key(temp_cache_dir):
+    """Test that a missing key is a cache miss."""
+    assert ai_cache.get('missing') is None
+
+
+def test_put_and_get(temp_cache_dir):
+    """Test storing and loading a cached response."""
+    response = {'score': 8, 'confidence': 90}
+    
+    ai_cache.put('abc123', response)
+    
+    assert ai_cache.get('abc123') == response
+    assert (temp_cache_dir / 'abc123.json').exists()
+
+
+def test_expired_entry_ignored(temp_cache_dir):
+    """Test that entries older than the TTL are treated as misses."""
+    ai_cache.put('abc123', {'score': 8})
+    
+    old = time.time() - ai_cache.CACHE_TTL_SECONDS - 60
+    os.utime(temp_cache_dir / 'abc123.json', (old, old))
+    
+    assert ai_cache.get('abc123') is None
+
+
+def test_corrupt_entry_ignored(temp_cache_dir):
+    """Test that unreadable entries are treated as misses."""
+    temp_cache_dir.mkdir(parents=True)
+    (temp_cache_dir / 'abc123.json').write_text('{not json')
+    
+    assert ai_cache.get('abc123') is None
+
+
+def test_cache_dir_env_override(tmp_path, monkeypatch):
+    """Test that INTENT_CACHE_DIR relocates the cache."""
+    monkeypatch.setenv('INTENT_CACHE_DIR', str(tmp_path / 'ci_cache'))
+    
+    assert ai_cache.get_cache_dir() == tmp_path / 'ci_cache'
+
+
+def test_cache_dir_env_expands_home(tmp_path, monkeypatch):
+    """Test that a ~ in INTENT_CACHE_DIR refers to the home directory."""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('INTENT_CACHE_DIR', '~/.intent/ai_cache')
+    
+    assert ai_cache.get_cache_dir() == tmp_path / '.intent' / 'ai_cache'
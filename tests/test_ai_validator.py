@@ -0,0 +1,335 @@
+"""Tests for the AI validator's local (non-API) logic."""
+
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from cli.ai_validator import (
+    AIValidator, get_validator, _ProgressWatcher, _TokenBucket, _compress_diff,
+    _get_limiter, _merge_intent_results, _merge_vulnerability_results,
+)
+
+
+@pytest.fixture
+def validator(monkeypatch):
+    """Create a validator with a dummy API key."""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    return AIValidator(use_cache=False)
+
+
+def test_get_validator_is_shared(monkeypatch):
+    """Test that validators are reused per process and per options."""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setattr('cli.ai_validator._validators', {})
+    
+    assert get_validator() is get_validator()
+    assert get_validator(use_cache=False) is not get_validator()
+
+
+def test_detect_language_from_file_headers(validator):
+    """Test that diff file headers decide the language."""
+    diff = (
+        "diff --git a/app.go b/app.go\n"
+        "--- a/app.go\n"
+        "+++ b/app.go\n"
+        "+import \"fmt\"\n"
+    )
+    assert validator._detect_language(diff) == 'Go'
+
+
+def test_detect_language_most_common_extension(validator):
+    """Test that the most frequently changed file type wins."""
+    diff = "+++ b/README.md\n+++ b/a.ts\n+++ b/b.ts\n+++ b/c.py\n"
+    assert validator._detect_language(diff) == 'TypeScript'
+
+
+def test_detect_language_from_keywords(validator):
+    """Test the keyword fallback when no file headers are known."""
+    assert validator._detect_language("+#include <vector>\n") == 'C++'
+    assert validator._detect_language("+let total = 0\n") == 'JavaScript'
+
+
+def test_detect_language_unknown(validator):
+    """Test that plain text is not attributed to a language."""
+    assert validator._detect_language("+++ b/README.md\n+Fix a typo\n") == 'Unknown'
+
+
+def test_detect_language_docs_only_prose(validator):
+    """Test that prose in docs-only diffs is not mistaken for code keywords."""
+    for line in ["Run the tests before you send", "Pick the type of install", "Users can import data"]:
+        diff = f"--- a/docs/guide.md\n+++ b/docs/guide.md\n+{line}\n"
+        assert validator._detect_language(diff) == 'Unknown'
+
+
+def test_progress_watcher_reports_fields_once_complete():
+    """Test that streamed fields are reported only after their value is complete."""
+    reported = []
+    watcher = _ProgressWatcher(lambda field, value: reported.append((field, value)))
+    
+    watcher.feed('{"score": 1')
+    assert reported == []
+    
+    watcher.feed('0, "alignment": "aligned", "score": 3')
+    watcher.feed(', "overall_severity": "LOW"}')
+    
+    assert reported == [('score', 10), ('alignment', 'aligned'), ('overall_severity', 'LOW')]
+
+
+def test_trivial_diff_skips_api(monkeypatch):
+    """Test that docs-only diffs are answered without calling the API."""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    validator = AIValidator(use_cache=False, skip_trivial=True)
+    diff = "--- a/README.md\n+++ b/README.md\n-Teh docs\n+The docs\n"
+    
+    assert validator.validate_intent('Fix README typo', diff)['skipped']
+    assert validator.check_vulnerabilities(diff)['overall_severity'] == 'NONE'
+    assert validator.analyze('Fix README typo', diff)['alignment']['alignment'] == 'not_applicable'
+
+
+def test_code_diff_is_not_trivial(monkeypatch):
+    """Test that diffs containing code are never skipped."""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    validator = AIValidator(use_cache=False, skip_trivial=True)
+    
+    assert not validator._is_trivial_diff("+++ b/app.py\n+x = 1\n")
+
+
+def test_trivial_skip_is_opt_in(validator):
+    """Test that short-circuiting is disabled unless requested."""
+    assert not validator._is_trivial_diff("+++ b/README.md\n+The docs\n")
+
+
+def test_get_intent_history_newest_first(validator, tmp_path, monkeypatch):
+    """Test that only the newest history files are read, newest first."""
+    monkeypatch.setattr('cli.utils.get_intent_dir', lambda: tmp_path)
+    for day in range(1, 6):
+        data = {
+            'message': f'Intent {day}',
+            'commits': [
+                {'validation': None},
+                {'validation': {'score': day}},
+            ],
+        }
+        (tmp_path / f'intent_2024010{day}_120000.json').write_text(json.dumps(data))
+    
+    history = validator.get_intent_history(max_items=3)
+    
+    assert [h['intent'] for h in history] == ['Intent 5', 'Intent 4', 'Intent 3']
+    assert history[0] == {'intent': 'Intent 5', 'score': 5, 'commits': 2}
+
+
+def _file_diff(name, body):
+    """Build a single-file diff section."""
+    return (
+        f"diff --git a/{name} b/{name}\n"
+        f"--- a/{name}\n"
+        f"+++ b/{name}\n"
+        f"{body}"
+    )
+
+
+def test_compress_diff_trims_context():
+    """Test that unchanged lines far from any change are dropped."""
+    context = ''.join(f" line {i}\n" for i in range(10))
+    diff = _file_diff('app.py', "@@ -1,21 +1,21 @@\n" + context + "-old\n+new\n" + context)
+    
+    chunks = _compress_diff(diff)
+    
+    assert len(chunks) == 1
+    assert chunks[0].endswith(" line 8\n line 9\n-old\n+new\n line 0\n line 1\n")
+    assert " line 7\n" not in chunks[0]
+
+
+def test_compress_diff_drops_minified_files():
+    """Test that files named as minified or generated are reduced to the file header."""
+    diff = _file_diff('bundle.min.js', "@@ -1 +1 @@\n+" + "x" * 600 + "\n")
+    diff += _file_diff('app.py', "@@ -1 +1 @@\n+x = 1\n")
+    
+    chunks = _compress_diff(diff)
+    
+    assert len(chunks) == 1
+    assert "x" * 600 not in chunks[0]
+    assert "+x = 1\n" in chunks[0]
+
+
+def test_compress_diff_keeps_code_with_long_line():
+    """Test that one overlong line in a code file does not hide the rest of it."""
+    diff = _file_diff('app.py', "@@ -1,2 +1,2 @@\n+x = '" + "x" * 600 + "'\n+y = 2\n")
+    
+    chunks = _compress_diff(diff)
+    
+    assert len(chunks) == 1
+    assert "x" * 600 not in chunks[0]
+    assert "+[line of " in chunks[0]
+    assert "+y = 2\n" in chunks[0]
+
+
+def test_compress_diff_splits_by_file():
+    """Test that oversized diffs are split into chunks at file boundaries."""
+    body = "@@ -1,2 +1,2 @@\n" + "+x = 1\n" * 200
+    diff = _file_diff('a.py', body) + _file_diff('b.py', body)
+    
+    chunks = _compress_diff(diff, max_tokens=500)
+    
+    assert len(chunks) == 2
+    assert chunks[0].startswith("diff --git a/a.py")
+    assert chunks[1].startswith("diff --git a/b.py")
+
+
+def test_merge_intent_results():
+    """Test that chunk scores are size-weighted and risk takes the worst case."""
+    results = [
+        {'score': 9, 'confidence': 90, 'risk_level': 'low', 'matches': ['a'], 'needs_human_review': False},
+        {'score': 3, 'confidence': 60, 'risk_level': 'high', 'matches': ['a', 'b'], 'needs_human_review': True},
+        {'error': 'timeout', 'score': None, 'confidence': 0},
+    ]
+    
+    merged = _merge_intent_results(results, [300, 100, 500])
+    
+    assert merged['score'] == 8
+    assert merged['alignment'] == 'aligned'
+    assert merged['confidence'] == 60
+    assert merged['risk_level'] == 'high'
+    assert merged['matches'] == ['a', 'b']
+    assert merged['needs_human_review'] is True
+    assert merged['failed_chunks'] == 1
+    assert 'timeout' in merged['partial_error']
+    assert 'error' not in merged
+
+
+def test_merge_vulnerability_results():
+    """Test that chunk scans keep the worst severity and all findings."""
+    results = [
+        {'overall_severity': 'LOW', 'confidence': 80, 'vulnerabilities': [{'type': 'xss'}]},
+        {'overall_severity': 'HIGH', 'confidence': 70, 'vulnerabilities': [{'type': 'secrets'}]},
+    ]
+    
+    merged = _merge_vulnerability_results(results)
+    
+    assert merged['overall_severity'] == 'HIGH'
+    assert merged['vulnerabilities'] == [{'type': 'xss'}, {'type': 'secrets'}]
+    assert merged['failed_chunks'] == 0
+    assert 'error' not in merged
+
+
+def test_merge_vulnerability_results_partial_scan_not_clean():
+    """Test that a failed chunk keeps a clean partial scan from reporting NONE."""
+    results = [
+        {'overall_severity': 'NONE', 'confidence': 90, 'vulnerabilities': []},
+        {'error': 'rate limited', 'overall_severity': 'UNKNOWN'},
+    ]
+    
+    merged = _merge_vulnerability_results(results)
+    
+    assert merged['overall_severity'] == 'UNKNOWN'
+    assert merged['failed_chunks'] == 1
+    assert '1 of 2 diff chunks' in merged['partial_error']
+    assert 'error' not in merged
+
+
+def test_merge_intent_results_all_failed():
+    """Test that a merge with no usable chunk reports error, not partial_error."""
+    results = [{'error': 'timeout', 'score': None}, {'error': 'timeout', 'score': None}]
+    
+    merged = _merge_intent_results(results, [100, 100])
+    
+    assert merged['failed_chunks'] == 2
+    assert '2 of 2 diff chunks' in merged['error']
+    assert 'partial_error' not in merged
+
+
+def test_get_intent_history_missing_dir(validator, tmp_path, monkeypatch):
+    """Test that a missing intent directory yields no history."""
+    monkeypatch.setattr('cli.utils.get_intent_dir', lambda: tmp_path / 'missing')
+    
+    assert validator.get_intent_history() == []
+
+
+def test_token_bucket_waits_when_budget_spent():
+    """Test that reservations beyond the per-minute budget wait for refill."""
+    async def spend():
+        bucket = _TokenBucket(6000)  # refills 100 tokens per second
+        await bucket.reserve(6000)
+        start = time.monotonic()
+        await bucket.reserve(10)
+        return time.monotonic() - start
+    
+    assert asyncio.run(spend()) >= 0.05
+
+
+def test_token_bucket_blocks_threads():
+    """Test that sync reservations beyond the budget block until refill."""
+    bucket = _TokenBucket(6000)
+    bucket.acquire(6000)
+    start = time.monotonic()
+    bucket.acquire(10)
+    
+    assert time.monotonic() - start >= 0.05
+
+
+def test_sync_calls_share_concurrency_limit(validator, monkeypatch):
+    """Test that sync requests from many threads respect INTENT_AI_CONCURRENCY."""
+    monkeypatch.setenv('INTENT_AI_CONCURRENCY', '2')
+    monkeypatch.setenv('INTENT_AI_TPM', '0')
+    monkeypatch.setattr('cli.ai_validator._sync_limiter', None)
+    lock = threading.Lock()
+    active = []
+    peak = []
+    
+    def create(**kwargs):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return iter([])
+    
+    monkeypatch.setattr(validator.client.chat.completions, 'create', create)
+    messages = [{'role': 'user', 'content': 'x'}]
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda _: validator._complete(messages, 0, 10, {}), range(6)))
+    
+    assert max(peak) == 2
+
+
+def test_token_bucket_disabled():
+    """Test that a zero budget never waits."""
+    async def spend():
+        bucket = _TokenBucket(0)
+        await bucket.reserve(10 ** 9)
+    
+    asyncio.run(spend())
+
+
+def test_zero_concurrency_rejected(monkeypatch):
+    """Test that a concurrency of 0 fails clearly instead of blocking forever."""
+    monkeypatch.setenv('INTENT_AI_CONCURRENCY', '0')
+    
+    async def limiter():
+        return _get_limiter()
+    
+    with pytest.raises(ValueError, match='INTENT_AI_CONCURRENCY'):
+        asyncio.run(limiter())
+
+
+def test_system_prompt_is_static(validator, monkeypatch):
+    """Test that only the user message varies between requests."""
+    monkeypatch.setattr(validator, '_history_context', lambda: '')
+    first = validator._intent_messages('Add login', "+++ b/app.py\n+def login(): pass\n")
+    second = validator._intent_messages('Fix typo', "+++ b/app.go\n+func main() {}\n")
+    
+    assert first[0] == second[0]
+    assert 'Intent: "Add login"' in first[1]['content']
+    assert 'Language Detected: Go' in second[1]['content']
+
+
+def test_language_override_skips_detection(validator, monkeypatch):
+    """Test that a known language is forwarded instead of detected again."""
+    monkeypatch.setattr(validator, '_history_context', lambda: '')
+    
+    messages = validator._vulnerability_messages("+++ b/app.py\n+x = 1\n", language='Go')
+    
+    assert 'Language: Go\n' in messages[1]['content']
@@ -0,0 +1,43 @@
+"""Tests for git directory discovery used by install-hooks."""
+
+import pytest
+from cli.install_hooks import _find_git_dir, _get_common_dir
+
+
+@pytest.fixture(autouse=True)
+def no_git_dir_env(monkeypatch):
+    """Make sure GIT_DIR from the environment does not leak into tests."""
+    monkeypatch.delenv('GIT_DIR', raising=False)
+
+
+def test_find_git_dir_from_subdirectory(tmp_path):
+    """Test that the .git directory is found from a nested directory."""
+    (tmp_path / '.git').mkdir()
+    nested = tmp_path / 'src' / 'pkg'
+    nested.mkdir(parents=True)
+    
+    assert _find_git_dir(nested) == (tmp_path / '.git').resolve()
+
+
+def test_find_git_dir_worktree(tmp_path):
+    """Test that a .git file is followed to the worktree git directory."""
+    main_git = tmp_path / 'main' / '.git'
+    worktree_git = main_git / 'worktrees' / 'feature'
+    worktree_git.mkdir(parents=True)
+    (worktree_git / 'commondir').write_text('../..\n')
+    
+    worktree = tmp_path / 'feature'
+    worktree.mkdir()
+    (worktree / '.git').write_text(f'gitdir: {worktree_git}\n')
+    
+    git_dir = _find_git_dir(worktree)
+    
+    assert git_dir == worktree_git.resolve()
+    assert _get_common_dir(git_dir) == main_git.resolve()
+
+
+def test_find_git_dir_outside_repository(tmp_path, monkeypatch):
+    """Test that None is returned outside any repository."""
+    monkeypatch.setattr('pathlib.Path.is_dir', lambda self: False)
+    
+    assert _find_git_dir(tmp_path) is None
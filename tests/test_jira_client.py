@@ -0,0 +1,269 @@
+"""Tests for the Jira client's local (non-API) logic."""
+
+import io
+import json
+import pytest
+import requests
+from cli.jira_client import JiraClient, get_jira_client
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Create a Jira client with dummy credentials."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('INTENT_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('JIRA_URL', 'https://example.atlassian.net/')
+    monkeypatch.setenv('JIRA_EMAIL', 'dev@example.com')
+    monkeypatch.setenv('JIRA_API_TOKEN', 'token')
+    client = JiraClient()
+    # The issue cache is shared process-wide; start each test empty
+    client.invalidate()
+    return client
+
+
+class FakeResponse:
+    """Minimal stand-in for a requests response."""
+    
+    def __init__(self, payload, status_code=200):
+        self.content = json.dumps(payload).encode('utf-8')
+        self.status_code = status_code
+    
+    def raise_for_status(self):
+        pass
+
+
+ISSUE_PAYLOAD = {
+    'key': 'PROJ-1',
+    'fields': {
+        'summary': 'Add login',
+        'description': None,
+        'issuetype': {'name': 'Story'},
+        'status': {'name': 'In Progress'},
+        'priority': None,
+        'assignee': None,
+        'labels': ['auth'],
+        'components': [{'name': 'api'}],
+    },
+}
+
+
+def _adf(*paragraphs):
+    """Build an ADF document with one paragraph per string."""
+    return {
+        'type': 'doc',
+        'content': [
+            {'type': 'paragraph', 'content': [{'type': 'text', 'text': text}]}
+            for text in paragraphs
+        ],
+    }
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('PROJ-123: Add login', 'PROJ-123'),
+    ('[AB-7] Fix crash', 'AB-7'),
+    ('Fix crash for proj-123', None),
+])
+def test_extract_jira_id(client, message, expected):
+    """Test extracting the issue key from commit messages."""
+    assert client.extract_jira_id(message) == expected
+
+
+def test_adf_to_text(client):
+    """Test flattening nested ADF content to plain text."""
+    doc = {
+        'type': 'doc',
+        'content': [
+            {'type': 'heading', 'content': [{'type': 'text', 'text': 'Goal'}]},
+            {'type': 'paragraph', 'content': [
+                {'type': 'text', 'text': 'Add'},
+                {'type': 'text', 'text': 'OAuth'},
+            ]},
+            {'type': 'bulletList', 'content': [
+                {'type': 'listItem', 'content': [
+                    {'type': 'paragraph', 'content': [{'type': 'text', 'text': 'Google'}]},
+                ]},
+                {'type': 'listItem', 'content': [
+                    {'type': 'paragraph', 'content': []},
+                ]},
+            ]},
+            {'type': 'rule'},
+        ],
+    }
+    
+    assert client._extract_description(doc) == 'Goal\nAdd OAuth\nGoogle'
+
+
+def test_extract_acceptance_criteria(client):
+    """Test finding the acceptance criteria section of a description."""
+    description = "Add login.\nAcceptance Criteria:\n- Users can log in\n- Errors are shown\n\nNotes"
+    
+    assert client._extract_acceptance_criteria(description) == '- Users can log in\n- Errors are shown'
+    assert client._extract_acceptance_criteria(_adf('No criteria here')) == ''
+
+
+def test_extract_acceptance_criteria_short_heading(client):
+    """Test that the abbreviated AC heading is recognised."""
+    assert client._extract_acceptance_criteria("Login\n\nAC:\nToken refresh works") == 'Token refresh works'
+
+
+def test_extract_acceptance_criteria_ignores_words_ending_in_ac(client):
+    """Test that a line ending in "ac" is not mistaken for the AC heading."""
+    description = "Add dark mode for Mac\nUsers want it.\n\nAcceptance Criteria:\n- toggle works"
+    
+    assert client._extract_acceptance_criteria(description) == '- toggle works'
+
+
+@pytest.mark.parametrize('heading', ['h3. Acceptance Criteria', '## Acceptance Criteria', '*Acceptance Criteria:*'])
+def test_extract_acceptance_criteria_markup_heading(client, heading):
+    """Test that Jira and Markdown heading markup before the AC heading is accepted."""
+    assert client._extract_acceptance_criteria(f"{heading}\n- works") == '- works'
+
+
+def test_session_retries_transient_errors(client):
+    """Test that Jira requests are retried on rate limiting and server errors."""
+    retries = client.session.get_adapter('https://example.atlassian.net').max_retries
+    
+    assert retries.total == 3
+    assert 429 in retries.status_forcelist
+
+
+def test_session_caches_issue_reads_on_disk(client, tmp_path):
+    """Test that GET responses are cached in the AI cache directory when requests-cache is installed."""
+    requests_cache = pytest.importorskip('requests_cache')
+    
+    assert isinstance(client.session, requests_cache.CachedSession)
+    assert client.session.settings.allowable_methods == ('GET',)
+    assert client.session.settings.cache_control is False
+    assert (tmp_path / 'cache' / 'jira_cache.sqlite').exists()
+
+
+def test_session_caches_no_store_responses(client):
+    """Test that Jira's Cache-Control: no-store does not stop issues being cached."""
+    pytest.importorskip('requests_cache')
+    from requests.adapters import HTTPAdapter
+    from urllib3 import HTTPResponse
+    
+    class JiraAdapter(HTTPAdapter):
+        """Answer every request like Jira Cloud, counting the calls."""
+        
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+        
+        def send(self, request, **kwargs):
+            self.calls += 1
+            raw = HTTPResponse(
+                body=io.BytesIO(json.dumps(ISSUE_PAYLOAD).encode('utf-8')),
+                headers={'Content-Type': 'application/json', 'Cache-Control': 'no-cache, no-store, no-transform'},
+                status=200,
+                preload_content=False,
+                request_url=request.url
+            )
+            return self.build_response(request, raw)
+    
+    adapter = JiraAdapter()
+    client.session.mount('https://', adapter)
+    
+    client._fetch_issue('PROJ-1')
+    client._fetch_issue('PROJ-1')
+    
+    assert adapter.calls == 1
+
+
+def test_adf_to_text_deeply_nested(client):
+    """Test that deeply nested lists do not hit the recursion limit."""
+    node = {'type': 'paragraph', 'content': [{'type': 'text', 'text': 'deep'}]}
+    for _ in range(5000):
+        node = {'type': 'bulletList', 'content': [{'type': 'listItem', 'content': [node]}]}
+    
+    assert client._adf_to_text({'type': 'doc', 'content': [node]}) == 'deep'
+
+
+def test_get_issue_is_cached(client, monkeypatch):
+    """Test that issues are fetched once until invalidated."""
+    calls = []
+    
+    def fake_fetch(issue_key):
+        calls.append(issue_key)
+        return {'key': issue_key, 'summary': 'Add login'}
+    
+    monkeypatch.setattr(client, '_fetch_issue', fake_fetch)
+    
+    assert client.get_issue('PROJ-1') is client.get_issue('PROJ-1')
+    assert calls == ['PROJ-1']
+    
+    client.invalidate('PROJ-1')
+    client.get_issue('PROJ-1')
+    assert calls == ['PROJ-1', 'PROJ-1']
+
+
+def test_fetch_issue_parses_fields(client, monkeypatch):
+    """Test that the issue payload is reduced to the fields used for validation."""
+    requests_made = []
+    
+    def fake_get(url, **kwargs):
+        requests_made.append((url, kwargs.get('params')))
+        return FakeResponse(ISSUE_PAYLOAD)
+    
+    monkeypatch.setattr(client.session, 'get', fake_get)
+    
+    issue = client.get_issue('PROJ-1')
+    
+    url, params = requests_made[0]
+    assert url == 'https://example.atlassian.net/rest/api/3/issue/PROJ-1'
+    assert 'summary' in params['fields'].split(',')
+    
+    assert issue['summary'] == 'Add login'
+    assert issue['issue_type'] == 'Story'
+    assert issue['priority'] == 'None'
+    assert issue['assignee'] == 'Unassigned'
+    assert issue['components'] == ['api']
+    assert issue['description'] == ''
+
+
+def test_issue_cache_shared_between_clients(client, monkeypatch):
+    """Test that a new client for the same site reuses already fetched issues."""
+    monkeypatch.setattr(client, '_fetch_issue', lambda key: {'key': key, 'summary': 'Add login'})
+    issue = client.get_issue('PROJ-1')
+    
+    other = JiraClient()
+    monkeypatch.setattr(other, '_fetch_issue', lambda key: pytest.fail('unexpected fetch'))
+    
+    assert other.get_issue('PROJ-1') is issue
+
+
+def test_get_jira_client_is_shared(client, monkeypatch):
+    """Test that one client is reused per process."""
+    monkeypatch.setattr('cli.jira_client._client', None)
+    
+    assert get_jira_client() is get_jira_client()
+
+
+def test_get_issues_batches_into_one_search(client, monkeypatch):
+    """Test that several issues are fetched with a single search request."""
+    searches = []
+    
+    def fake_post(url, json=None, **kwargs):
+        searches.append(json)
+        issues = [dict(ISSUE_PAYLOAD, key=key) for key in ('PROJ-1', 'PROJ-2')]
+        return FakeResponse({'issues': issues})
+    
+    monkeypatch.setattr(client.session, 'post', fake_post)
+    monkeypatch.setattr(client, '_fetch_issue', lambda key: pytest.fail('unexpected fetch'))
+    
+    issues = client.get_issues(['PROJ-1', 'PROJ-2', 'PROJ-1'])
+    
+    assert len(searches) == 1
+    assert searches[0]['jql'] == 'key in (PROJ-1, PROJ-2)'
+    assert sorted(issues) == ['PROJ-1', 'PROJ-2']
+    assert client.get_issue('PROJ-2')['summary'] == 'Add login'
+
+
+def test_get_issues_search_failure_is_not_fatal(client, monkeypatch):
+    """Test that a rejected search leaves issues for individual fetches."""
+    def fake_post(url, **kwargs):
+        raise requests.exceptions.HTTPError('400 Client Error')
+    
+    monkeypatch.setattr(client.session, 'post', fake_post)
+    
+    assert client.get_issues(['PROJ-1']) == {}
@@ -69,3 +69,73 @@ def test_save_closed_intent_creates_history(temp_intent_dir):
     with open(history_files[0]) as f:
         data = json.load(f)
     assert data['message'] == 'Test intent'
+
+
+def test_save_intent_leaves_no_temp_files(temp_intent_dir):
+    """Test that saving replaces the intent file without leftover temp files."""
+    save_intent({'message': 'First', 'status': 'active'})
+    save_intent({'message': 'Second', 'status': 'active'})
+    
+    assert [p.name for p in temp_intent_dir.iterdir()] == ['current_intent.json']
+    assert get_current_intent()['message'] == 'Second'
+
+
+def test_write_atomic_concurrent_threads(tmp_path):
+    """Test that threads writing the same file never clash on a temp file."""
+    from concurrent.futures import ThreadPoolExecutor
+    from cli.utils import _write_atomic
+    
+    target = tmp_path / 'entry.json'
+    payloads = [json.dumps({'n': n}).encode('utf-8') for n in range(50)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda data: _write_atomic(target, data), payloads))
+    
+    assert target.read_bytes() in payloads
+    assert [p.name for p in tmp_path.iterdir()] == ['entry.json']
+
+
+def test_write_atomic_failure_removes_temp_file(tmp_path, monkeypatch):
+    """Test that a failed replace leaves neither the target nor a temp file."""
+    from cli.utils import _write_atomic
+    
+    def fail_replace(src, dst):
+        raise OSError('disk full')
+    
+    monkeypatch.setattr('cli.utils.os.replace', fail_replace)
+    
+    with pytest.raises(OSError):
+        _write_atomic(tmp_path / 'entry.json', b'{}')
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_atomic_uses_umask_mode(tmp_path):
+    """Test that written files get the usual umask mode, not the 0600 of temp files."""
+    import os
+    import stat
+    from cli.utils import _write_atomic, _UMASK
+    
+    _write_atomic(tmp_path / 'entry.json', b'{}')
+    
+    assert stat.S_IMODE(os.stat(tmp_path / 'entry.json').st_mode) == 0o666 & ~_UMASK
+
+
+def test_get_git_diff_reads_staged_changes(tmp_path, monkeypatch):
+    """Test that staged changes are read in-process when pygit2 is available."""
+    pygit2 = pytest.importorskip('pygit2')
+    from cli.utils import get_git_diff
+    
+    repo = pygit2.init_repository(str(tmp_path))
+    signature = pygit2.Signature('Dev', 'dev@example.com')
+    (tmp_path / 'app.py').write_text('x = 1\n')
+    repo.index.add('app.py')
+    repo.index.write()
+    repo.create_commit('HEAD', signature, signature, 'Initial', repo.index.write_tree(), [])
+    
+    (tmp_path / 'app.py').write_text('x = 2\n')
+    repo.index.add('app.py')
+    repo.index.write()
+    monkeypatch.chdir(tmp_path)
+    
+    diff = get_git_diff()
+    
+    assert '-x = 1\n+x = 2\n' in diff
@@ -0,0 +1,74 @@
+"""Tests for the PR validation script's local (non-API) logic."""
+
+from cli.validate_pr import _GITHUB_SESSION, _find_jira_ids, _truncate_diff, generate_pr_comment
+
+
+def test_find_jira_ids_deduplicates():
+    """Test that IDs repeated across subjects are collected once."""
+    subjects = ['PROJ-1: Add login', 'PROJ-1 fix tests', '[OPS-22] Deploy PROJ-3']
+    
+    assert _find_jira_ids(subjects, limit=10) == {'PROJ-1', 'OPS-22', 'PROJ-3'}
+
+
+def test_find_jira_ids_stops_at_limit(capsys):
+    """Test that subjects past the limit are not scanned."""
+    subjects = ['PROJ-1 first', 'PROJ-2 second', 'PROJ-3 third']
+    
+    assert _find_jira_ids(subjects, limit=2) == {'PROJ-1', 'PROJ-2'}
+    assert 'more than 2 commits' in capsys.readouterr().out
+
+
+def test_truncate_diff_keeps_every_file():
+    """Test that a large file is cut while small files stay whole."""
+    small = "diff --git a/small.py b/small.py\n+x = 1"
+    large = "diff --git a/large.py b/large.py\n" + "+line\n" * 1000
+    
+    truncated = _truncate_diff(large + "\n" + small, max_bytes=500)
+    
+    assert truncated.startswith("diff --git a/large.py")
+    assert truncated.endswith(small)
+    assert '... truncated ...' in truncated
+    assert len(truncated) < 600
+
+
+def test_truncate_diff_within_limit():
+    """Test that small diffs and a zero limit leave the diff untouched."""
+    diff = "diff --git a/app.py b/app.py\n+print('hi')"
+    
+    assert _truncate_diff(diff, max_bytes=1000) == diff
+    assert _truncate_diff(diff * 100, max_bytes=0) == diff * 100
+
+
+def test_generate_pr_comment_summary():
+    """Test that the report lists each story and totals the scores."""
+    results = [
+        {
+            'jira_id': 'PROJ-1',
+            'summary': 'Add login',
+            'score': 8,
+            'confidence': 90,
+            'status': 'aligned',
+            'key_functionality_present': True,
+            'matches': ['a', 'b', 'c', 'd'],
+            'discrepancies': [],
+            'suggestions': [],
+        },
+        {'jira_id': 'PROJ-2', 'error': 'Issue not found', 'score': 0},
+    ]
+    
+    comment = generate_pr_comment({'results': results})
+    
+    assert '### PROJ-1: Add login' in comment
+    assert '- c\n' in comment and '- d\n' not in comment
+    assert '**Error:** Issue not found' in comment
+    assert '**Average Score:** 4.0/10' in comment
+    assert '**Critical Issues:** 1' in comment
+
+
+def test_github_session_never_resends_after_read_timeout():
+    """Test that a comment POST is retried on refused connections and 429 only."""
+    retries = _GITHUB_SESSION.get_adapter('https://api.github.com').max_retries
+    
+    assert retries.read == 0
+    assert retries.connect is None or retries.connect > 0
+    assert retries.status_forcelist == (429,)